@@ -3,21 +3,145 @@ Calculador de jornada de trabalho — CLT.
 Agrupa marcações por dia, calcula horas trabalhadas,
 horas extras, atrasos e faltas baseado na escala configurada.
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, date, time, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from calendar import monthrange
 from app.models import (
-    Punch, Employee, WorkDay, ScheduleConfig, 
+    Punch, Employee, WorkDay, ScheduleConfig,
     ScheduleType, MonthlyReport, Company
 )
 
 
+@lru_cache(maxsize=256)
+def _is_workday_impl(
+    stype: ScheduleType, workdays: Tuple[int, ...], weekday: int
+) -> bool:
+    """Verifica se o dia da semana é dia de trabalho na escala.
+
+    Puro em relação aos argumentos — o lru_cache elimina o dispatch
+    por ScheduleType nas chamadas repetidas.
+    """
+    if stype == ScheduleType.STANDARD:
+        # Seg-Sex + Sáb meio período
+        return weekday <= 5
+    elif stype == ScheduleType.SCALE_5X2:
+        return weekday in workdays
+    elif stype == ScheduleType.SCALE_6X1:
+        # 6 dias, 1 folga (domingo padrão)
+        return weekday <= 5
+    elif stype == ScheduleType.SCALE_12X36:
+        # 12x36 não segue semana fixa — precisa de lógica especial
+        return True  # Sempre calculado pelo padrão de marcações
+    elif stype in (ScheduleType.PARTIAL_30, ScheduleType.PARTIAL_26):
+        return weekday in workdays
+    elif stype == ScheduleType.CUSTOM:
+        return weekday in workdays
+
+    return weekday in workdays
+
+
+@lru_cache(maxsize=256)
+def _expected_hours_impl(
+    stype: ScheduleType, workdays: Tuple[int, ...], weekday: int,
+    daily_hours: float, saturday_hours: float
+) -> float:
+    """Retorna as horas esperadas para um dia da semana na escala."""
+    if stype == ScheduleType.STANDARD:
+        if weekday <= 4:  # Seg-Sex
+            return daily_hours if daily_hours else 8.0
+        elif weekday == 5:  # Sábado
+            return saturday_hours
+        return 0.0
+
+    elif stype == ScheduleType.SCALE_5X2:
+        if weekday in workdays:
+            return daily_hours  # Usa configuração (padrão 8h)
+        return 0.0
+
+    elif stype == ScheduleType.SCALE_6X1:
+        if weekday <= 4:
+            return daily_hours if daily_hours else 8.0
+        elif weekday == 5:
+            return saturday_hours
+        return 0.0
+
+    elif stype == ScheduleType.SCALE_12X36:
+        return 12.0
+
+    elif stype == ScheduleType.PARTIAL_30:
+        if weekday in workdays:
+            return daily_hours
+        return 0.0
+
+    elif stype == ScheduleType.PARTIAL_26:
+        if weekday in workdays:
+            return daily_hours
+        return 0.0
+
+    elif stype == ScheduleType.CUSTOM:
+        if weekday in workdays:
+            return daily_hours
+        return 0.0
+
+    return daily_hours if weekday in workdays else 0.0
+
+
+# Singleton para dias sem marcações — evita alocar uma lista vazia por dia
+_NO_PUNCHES: Tuple[Punch, ...] = ()
+
+
+@dataclass(frozen=True)
+class _CompiledSchedule:
+    """
+    Escala pré-compilada: tabelas por dia da semana e constantes derivadas,
+    construída uma vez por escala para o loop diário consumir sem
+    redespachar por ScheduleType.
+    """
+    is_workday: Tuple[bool, ...]        # indexada por weekday (0=segunda)
+    expected_hours: Tuple[float, ...]   # idem
+    entry_minute: Tuple[int, ...]       # entrada esperada por weekday, em min
+    tolerance_minutes: int
+    tolerance_hours: float
+    max_overtime_hours: float
+
+
 class WorkCalculator:
     """Calcula horas trabalhadas, extras e faltas baseado em regras CLT."""
     
     def __init__(self, default_schedule: Optional[ScheduleConfig] = None):
         self.default_schedule = default_schedule or ScheduleConfig()
-    
+        # Escalas pré-compiladas, memoizadas por identidade do objeto —
+        # evita o dispatch por ScheduleType a cada dia de cada funcionário.
+        self._schedule_cache: Dict[int, _CompiledSchedule] = {}
+
+    def _compile(self, schedule: ScheduleConfig) -> _CompiledSchedule:
+        """Compila (e memoiza) as tabelas derivadas de uma escala."""
+        key = id(schedule)
+        compiled = self._schedule_cache.get(key)
+        if compiled is None:
+            week_entry = schedule.entry_time.hour * 60 + schedule.entry_time.minute
+            entry_minute = [week_entry] * 7
+            if schedule.schedule_type == ScheduleType.STANDARD:
+                # Sábado meio período entra mais cedo — resolvido aqui,
+                # sem branch por dia no loop quente
+                entry_minute[5] = (
+                    schedule.saturday_entry.hour * 60 + schedule.saturday_entry.minute
+                )
+            compiled = _CompiledSchedule(
+                is_workday=tuple(self._is_workday(w, schedule) for w in range(7)),
+                expected_hours=tuple(self._expected_hours(w, schedule) for w in range(7)),
+                entry_minute=tuple(entry_minute),
+                tolerance_minutes=schedule.tolerance_minutes,
+                tolerance_hours=schedule.tolerance_minutes / 60,
+                max_overtime_hours=schedule.max_daily_overtime_hours,
+            )
+            self._schedule_cache[key] = compiled
+        return compiled
+
     def process_employee(
         self, 
         employee: Employee, 
@@ -25,7 +149,9 @@ class WorkCalculator:
         month: int, 
         year: int,
         start_date: date = None,
-        end_date: date = None
+        end_date: date = None,
+        days_in_month: int = None,
+        month_dates: Tuple[date, ...] = None
     ) -> Employee:
         """
         Processa todas as marcações de um funcionário.
@@ -33,51 +159,97 @@ class WorkCalculator:
         Caso contrário, usa o mês completo.
         """
         schedule = employee.schedule or self.default_schedule
-        
+
         # Define período
         if start_date and end_date:
             period_start = start_date
             period_end = end_date
         else:
-            _, days_in_month = monthrange(year, month)
+            if days_in_month is None:
+                _, days_in_month = monthrange(year, month)
             period_start = date(year, month, 1)
             period_end = date(year, month, days_in_month)
-        
-        # Agrupa marcações por dia (dentro do período)
-        punches_by_day: Dict[date, List[Punch]] = {}
-        for punch in punches:
+
+        # Os objetos date do período são idênticos para todos os
+        # funcionários — o relatório constrói a tupla uma vez e passa aqui.
+        if month_dates is None:
+            n_days = (period_end - period_start).days + 1
+            month_dates = tuple(
+                period_start + timedelta(days=d) for d in range(n_days)
+            )
+
+        # Ordena uma única vez; o Timsort aproveita os trechos já
+        # cronológicos e o fatiamento abaixo preserva a ordem por dia.
+        # Punch é ordenável (order=True) — sem key= nem função por item.
+        punches.sort()
+
+        # Filtra o período e marca os limites de cada dia na própria
+        # lista ordenada — fatias diretas, sem dict intermediário
+        # de listas por dia.
+        if start_date and end_date:
+            selected = [
+                p for p in punches if period_start <= p.date <= period_end
+            ]
+        else:
+            # Mês completo: um único compare de int contra a chave ym
+            # pré-calculada no Punch, sem reextrair mês/ano do datetime
+            target_ym = year * 12 + month
+            selected = [p for p in punches if p.ym == target_ym]
+
+        days: List[date] = []
+        starts: List[int] = []
+        prev_day = None
+        for i, punch in enumerate(selected):
             day = punch.date
-            if period_start <= day <= period_end:
-                if day not in punches_by_day:
-                    punches_by_day[day] = []
-                punches_by_day[day].append(punch)
-        
-        # Ordena marcações dentro de cada dia
-        for day in punches_by_day:
-            punches_by_day[day].sort(key=lambda p: p.datetime)
-        
-        # Gera WorkDays para todos os dias do período
+            if day != prev_day:
+                days.append(day)
+                starts.append(i)
+                prev_day = day
+        starts.append(len(selected))
+
+        # Gera WorkDays para todos os dias do período. month_dates e
+        # days são ambos crescentes — um índice avançando substitui o
+        # lookup por dia.
+        compiled = self._compile(schedule)
+        is_wd_table = compiled.is_workday
+        exp_table = compiled.expected_hours
         employee.workdays = []
-        current = period_start
-        while current <= period_end:
-            day_punches = punches_by_day.get(current, [])
-            workday = self._calculate_workday(current, day_punches, schedule)
+        employee._totals_cache = None  # os agregados serão recalculados
+        di = 0
+        n_days = len(days)
+        for current in month_dates:
+            if di < n_days and days[di] == current:
+                day_punches = selected[starts[di]:starts[di + 1]]
+                di += 1
+            else:
+                weekday = current.weekday()
+                if not is_wd_table[weekday]:
+                    # Folga sem marcações — atalho que pula o cálculo
+                    # completo (20–30% dos dias em escalas com domingo livre)
+                    employee.workdays.append(WorkDay(
+                        date=current,
+                        punches=_NO_PUNCHES,
+                        is_workday=False,
+                        expected_hours=exp_table[weekday],
+                    ))
+                    continue
+                day_punches = _NO_PUNCHES
+            workday = self._calculate_workday(current, day_punches, compiled)
             employee.workdays.append(workday)
-            current += timedelta(days=1)
-        
+
         return employee
-    
+
     def _calculate_workday(
-        self, 
-        current_date: date, 
+        self,
+        current_date: date,
         punches: List[Punch],
-        schedule: ScheduleConfig
+        compiled: _CompiledSchedule
     ) -> WorkDay:
         """Calcula as horas de um dia específico."""
         weekday = current_date.weekday()  # 0=segunda, 6=domingo
-        is_workday = self._is_workday(weekday, schedule)
-        expected = self._expected_hours(weekday, schedule)
-        
+        is_workday = compiled.is_workday[weekday]
+        expected = compiled.expected_hours[weekday]
+
         workday = WorkDay(
             date=current_date,
             punches=punches,
@@ -117,7 +289,7 @@ class WorkCalculator:
         
         if not is_workday and punches:
             # Trabalhou em dia de folga — tudo é hora extra
-            worked = self._calc_worked_hours(punches, schedule)
+            worked = self._calc_worked_hours(punches)
             workday.worked_hours = worked
             workday.overtime_hours = worked
             if not workday.observation:
@@ -125,30 +297,29 @@ class WorkCalculator:
             return workday
         
         # Dia normal de trabalho
-        worked = self._calc_worked_hours(punches, schedule)
+        worked = self._calc_worked_hours(punches)
         workday.worked_hours = worked
         
         # Verifica atraso (primeira entrada vs horário esperado)
-        entry_time = punches[0].time
-        expected_entry = schedule.entry_time
-        
-        if schedule.schedule_type == ScheduleType.STANDARD and weekday == 5:
-            expected_entry = schedule.saturday_entry
-        
-        late_minutes = self._time_diff_minutes(expected_entry, entry_time)
-        
-        if late_minutes > schedule.tolerance_minutes:
+        entry_minute = punches[0].minute_of_day
+        late_minutes = self._time_diff_minutes(
+            compiled.entry_minute[weekday], entry_minute
+        )
+
+        if late_minutes > compiled.tolerance_minutes:
             workday.is_late = True
             workday.late_minutes = late_minutes
         
         # Calcula horas extras e déficit
-        if worked > expected + (schedule.tolerance_minutes / 60):
+        tolerance_hours = compiled.tolerance_hours
+        max_overtime = compiled.max_overtime_hours
+        if worked > expected + tolerance_hours:
             overtime = worked - expected
             # Limita a 2h extras/dia (CLT)
-            workday.overtime_hours = min(overtime, schedule.max_daily_overtime_hours)
-            if overtime > schedule.max_daily_overtime_hours:
-                workday.observation = f"Excedeu {schedule.max_daily_overtime_hours}h extras"
-        elif worked < expected - (schedule.tolerance_minutes / 60):
+            workday.overtime_hours = min(overtime, max_overtime)
+            if overtime > max_overtime:
+                workday.observation = f"Excedeu {max_overtime}h extras"
+        elif worked < expected - tolerance_hours:
             workday.deficit_hours = expected - worked
         
         # Calcula intervalo realizado
@@ -164,9 +335,7 @@ class WorkCalculator:
         
         return workday
     
-    def _calc_worked_hours(
-        self, punches: List[Punch], schedule: ScheduleConfig
-    ) -> float:
+    def _calc_worked_hours(self, punches: List[Punch]) -> float:
         """
         Calcula horas trabalhadas a partir dos pares entrada/saída.
         Para 4 marcações: (E1→S1) + (E2→S2), descontando intervalo.
@@ -175,17 +344,18 @@ class WorkCalculator:
         """
         if len(punches) < 2:
             return 0.0
-        
+
+        # Segundos absolutos pré-calculados no Punch — aritmética de ints
+        # pura, sem criar um timedelta por par entrada/saída.
+        seconds = [p.wall_seconds for p in punches]
         total_minutes = 0.0
-        
+
         # Agrupa em pares (entrada, saída)
-        for i in range(0, len(punches) - 1, 2):
-            entry = punches[i].datetime
-            exit_p = punches[i + 1].datetime
-            diff = (exit_p - entry).total_seconds() / 60
+        for i in range(0, len(seconds) - 1, 2):
+            diff = (seconds[i + 1] - seconds[i]) / 60
             if diff > 0:
                 total_minutes += diff
-        
+
         # Se tem 2 marcações: respeitar o registro real.
         # NÃO descontar intervalo automaticamente — o funcionário
         # pode ter trabalhado direto sem almoço.
@@ -196,81 +366,25 @@ class WorkCalculator:
     def _calc_break_minutes(self, punches: List[Punch]) -> float:
         """Calcula o intervalo entre a 2ª e 3ª marcação (saída almoço → volta)."""
         if len(punches) >= 4:
-            exit_break = punches[1].datetime
-            return_break = punches[2].datetime
-            diff = (return_break - exit_break).total_seconds() / 60
+            diff = (punches[2].wall_seconds - punches[1].wall_seconds) / 60
             return max(0, diff)
         return 0.0
     
     def _is_workday(self, weekday: int, schedule: ScheduleConfig) -> bool:
         """Verifica se o dia da semana é dia de trabalho na escala."""
-        stype = schedule.schedule_type
-        
-        if stype == ScheduleType.STANDARD:
-            # Seg-Sex + Sáb meio período
-            return weekday <= 5
-        elif stype == ScheduleType.SCALE_5X2:
-            return weekday in schedule.workdays
-        elif stype == ScheduleType.SCALE_6X1:
-            # 6 dias, 1 folga (domingo padrão)
-            return weekday <= 5
-        elif stype == ScheduleType.SCALE_12X36:
-            # 12x36 não segue semana fixa — precisa de lógica especial
-            return True  # Sempre calculado pelo padrão de marcações
-        elif stype in (ScheduleType.PARTIAL_30, ScheduleType.PARTIAL_26):
-            return weekday in schedule.workdays
-        elif stype == ScheduleType.CUSTOM:
-            return weekday in schedule.workdays
-        
-        return weekday in schedule.workdays
-    
+        return _is_workday_impl(
+            schedule.schedule_type, tuple(schedule.workdays), weekday
+        )
+
     def _expected_hours(self, weekday: int, schedule: ScheduleConfig) -> float:
         """Retorna as horas esperadas para um dia da semana na escala."""
-        stype = schedule.schedule_type
-        
-        if stype == ScheduleType.STANDARD:
-            if weekday <= 4:  # Seg-Sex
-                return schedule.daily_hours if schedule.daily_hours else 8.0
-            elif weekday == 5:  # Sábado
-                return schedule.saturday_hours
-            return 0.0
-        
-        elif stype == ScheduleType.SCALE_5X2:
-            if weekday in schedule.workdays:
-                return schedule.daily_hours  # Usa configuração (padrão 8h)
-            return 0.0
-        
-        elif stype == ScheduleType.SCALE_6X1:
-            if weekday <= 4:
-                return schedule.daily_hours if schedule.daily_hours else 8.0
-            elif weekday == 5:
-                return schedule.saturday_hours
-            return 0.0
-        
-        elif stype == ScheduleType.SCALE_12X36:
-            return 12.0
-        
-        elif stype == ScheduleType.PARTIAL_30:
-            if weekday in schedule.workdays:
-                return schedule.daily_hours
-            return 0.0
-        
-        elif stype == ScheduleType.PARTIAL_26:
-            if weekday in schedule.workdays:
-                return schedule.daily_hours
-            return 0.0
-        
-        elif stype == ScheduleType.CUSTOM:
-            if weekday in schedule.workdays:
-                return schedule.daily_hours
-            return 0.0
-        
-        return schedule.daily_hours if weekday in schedule.workdays else 0.0
-    
-    def _time_diff_minutes(self, expected: time, actual: time) -> float:
+        return _expected_hours_impl(
+            schedule.schedule_type, tuple(schedule.workdays), weekday,
+            schedule.daily_hours, schedule.saturday_hours
+        )
+
+    def _time_diff_minutes(self, expected_min: int, actual_min: int) -> int:
         """Calcula diferença em minutos entre dois horários (positivo = atraso)."""
-        expected_min = expected.hour * 60 + expected.minute
-        actual_min = actual.hour * 60 + actual.minute
         return actual_min - expected_min
     
     def generate_report(
@@ -297,15 +411,46 @@ class WorkCalculator:
             generated_at=datetime.now()
         )
         
-        for pis, employee in employees.items():
-            emp_punches = [p for p in punches if p.pis == pis]
-            processed = self.process_employee(
-                employee, emp_punches, month, year,
-                start_date=start_date, end_date=end_date
+        # Agrupa marcações por PIS em uma única passada — O(E+P)
+        # em vez de varrer a lista inteira para cada funcionário.
+        buckets: Dict[str, List[Punch]] = {pis: [] for pis in employees}
+        for punch in punches:
+            buckets.setdefault(punch.pis, []).append(punch)
+
+        # (ano, mês) é constante no relatório — calcula uma vez só,
+        # assim como os objetos date do período (imutáveis e idênticos
+        # para todos os funcionários).
+        _, days_in_month = monthrange(year, month)
+        if start_date and end_date:
+            n_days = (end_date - start_date).days + 1
+            month_dates = tuple(
+                start_date + timedelta(days=d) for d in range(n_days)
             )
-            report.employees.append(processed)
-        
-        # Ordena por nome
-        report.employees.sort(key=lambda e: e.display_name)
-        
+        else:
+            month_dates = tuple(
+                date(year, month, d) for d in range(1, days_in_month + 1)
+            )
+
+        # Já itera em ordem de nome — o resultado sai ordenado e
+        # display_name é avaliado uma única vez por funcionário.
+        ordered = sorted(employees.items(), key=lambda kv: kv[1].display_name)
+
+        def _process(item):
+            pis, employee = item
+            return self.process_employee(
+                employee, buckets[pis], month, year,
+                start_date=start_date, end_date=end_date,
+                days_in_month=days_in_month, month_dates=month_dates
+            )
+
+        cpus = os.cpu_count() or 1
+        if len(ordered) >= 8 and cpus > 1:
+            # Funcionários são independentes entre si — processa em
+            # paralelo mantendo a ordem dos resultados.
+            with ThreadPoolExecutor(max_workers=min(cpus, len(ordered))) as pool:
+                report.employees.extend(pool.map(_process, ordered))
+        else:
+            for item in ordered:
+                report.employees.append(_process(item))
+
         return report
@@ -9,17 +9,48 @@ Endpoints usados:
 
 Referência: https://www.controlid.com.br/suporte/api/
 """
+import http.client
 import json
-import urllib.request
-import urllib.error
+import shutil
 import urllib.parse
 import ssl
 import tempfile
+import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Decoder acelerado opcional — orjson aceita bytes direto, sem o
+# .decode('utf-8') intermediário. Cai para o json da stdlib se ausente.
+try:
+    import orjson as _json_loads_mod
+except ImportError:
+    _json_loads_mod = json
 from dataclasses import dataclass, field
 from typing import Optional, Tuple
 
 
+# Cache por IP da combinação (protocolo, porta, content-type) que funcionou
+# na última conexão — evita repetir a varredura de 8 sondagens (cada uma com
+# timeout de até 10s) a cada reconexão ao mesmo relógio.
+_DEVICE_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'controlid_devices.json')
+
+
+def _load_device_cache() -> dict:
+    try:
+        with open(_DEVICE_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_device_cache(cache: dict):
+    try:
+        with open(_DEVICE_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except Exception:
+        pass  # cache é apenas uma otimização — nunca falha a conexão
+
+
 @dataclass
 class ControlIDDevice:
     """Representa um relógio ControlID na rede."""
@@ -35,97 +66,225 @@ class ControlIDDevice:
 
 class ControlIDClient:
     """Cliente para API REST dos relógios ControlID (iDClass/iDFlex)."""
-    
+
+    # Corpo fixo do load_objects.fcgi — não precisa de json.dumps por chamada
+    _USERS_BODY = b'{"object": "users"}'
+
+    # Contexto SSL único para todos os clientes — criar um contexto
+    # (carga do bundle de CAs etc.) por instância é caro e desnecessário,
+    # já que relógios usam certificado autoassinado e não validamos nada.
+    _SHARED_SSL_CTX = ssl.create_default_context()
+    _SHARED_SSL_CTX.check_hostname = False
+    _SHARED_SSL_CTX.verify_mode = ssl.CERT_NONE
+    # Session tickets ligados: reconexões ao mesmo relógio aproveitam o
+    # cache de sessões do OpenSSL e pulam a troca de chaves completa
+    _SHARED_SSL_CTX.options &= ~ssl.OP_NO_TICKET
+
     def __init__(self, device: ControlIDDevice):
         self.device = device
-        self._ssl_ctx = ssl.create_default_context()
-        self._ssl_ctx.check_hostname = False
-        self._ssl_ctx.verify_mode = ssl.CERT_NONE
+        # Payloads de login têm forma fixa — codifica uma única vez e
+        # reutiliza em connect() e nas tentativas de auto-detecção.
+        login_data = {"login": device.login, "password": device.password}
+        self._login_body_json = json.dumps(login_data).encode('utf-8')
+        self._login_body_form = urllib.parse.urlencode(login_data).encode('utf-8')
+        self._ssl_ctx = ControlIDClient._SHARED_SSL_CTX
+        self._conn: Optional[http.client.HTTPConnection] = None
         self._update_base_url()
-    
+
     def _update_base_url(self):
         """Atualiza a URL base com protocolo e porta corretos."""
         self.base_url = f"{self.device.protocol}://{self.device.ip}:{self.device.port}"
-    
-    def _request(self, endpoint: str, data: dict = None, params: str = "") -> dict:
-        """Faz requisição POST para o equipamento."""
-        url = f"{self.base_url}/{endpoint}"
-        if params:
-            url += f"?{params}"
-        
-        body = json.dumps(data).encode('utf-8') if data else b'{}'
-        
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={
-                'Content-Type': 'application/json',
-                'Content-Length': str(len(body)),
-            },
-            method='POST'
-        )
-        
-        ctx = self._ssl_ctx if self.device.protocol == 'https' else None
-        
-        try:
-            with urllib.request.urlopen(req, context=ctx, timeout=10) as resp:
-                content = resp.read().decode('utf-8')
-                if content.strip():
-                    try:
-                        return json.loads(content)
-                    except json.JSONDecodeError:
-                        return {"raw": content}
-                return {}
-        except urllib.error.HTTPError as e:
-            error_body = ""
+        # Protocolo/porta mudaram — a conexão persistente fica inválida
+        self._close_conn()
+
+    def _get_conn(self) -> http.client.HTTPConnection:
+        """Retorna a conexão persistente, criando-a se necessário."""
+        if self._conn is None:
+            if self.device.protocol == 'https':
+                self._conn = http.client.HTTPSConnection(
+                    self.device.ip, self.device.port,
+                    context=self._ssl_ctx, timeout=10
+                )
+            else:
+                self._conn = http.client.HTTPConnection(
+                    self.device.ip, self.device.port, timeout=10
+                )
+        return self._conn
+
+    def _close_conn(self):
+        """Fecha a conexão persistente (se aberta)."""
+        conn = getattr(self, '_conn', None)
+        if conn is not None:
             try:
-                error_body = e.read().decode('utf-8', errors='replace')[:200]
+                conn.close()
             except Exception:
                 pass
+        self._conn = None
+
+    def close(self):
+        """Encerra a conexão com o relógio."""
+        self._close_conn()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    # Política de retentativa: até 2 retentativas com recuo exponencial
+    # (0.3s, 0.6s) — relógios derrubam conexões ociosas e redes locais
+    # têm perdas transitórias
+    _RETRIES = 2
+    _BACKOFF = 0.3
+
+    def _roundtrip(
+        self, path: str, body: bytes, headers: dict, timeout: float = None
+    ) -> http.client.HTTPResponse:
+        """
+        Faz um POST reaproveitando a conexão TCP/TLS persistente.
+        Reconecta com recuo se o relógio fechou a conexão ociosa.
+        """
+        for attempt in range(self._RETRIES + 1):
+            conn = self._get_conn()
+            if timeout is not None:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                return conn.getresponse()
+            except (http.client.HTTPException, OSError):
+                self._close_conn()
+                if attempt == self._RETRIES:
+                    raise
+                time.sleep(self._BACKOFF * (2 ** attempt))
+
+    def _request_bytes(
+        self, endpoint: str, data=None, params: str = "",
+        timeout: float = None, content_type: str = 'application/json'
+    ) -> bytes:
+        """
+        Núcleo de todas as requisições POST: monta o caminho, codifica o
+        corpo (dict ou bytes pré-codificados), envia e devolve o corpo da
+        resposta em bytes. Os métodos públicos só variam na decodificação.
+        """
+        path = f"/{endpoint}"
+        if params:
+            path += f"?{params}"
+
+        if isinstance(data, bytes):
+            body = data  # payload de forma fixa já codificado
+        else:
+            body = json.dumps(data).encode('utf-8') if data else b'{}'
+        headers = {
+            'Content-Type': content_type,
+            'Content-Length': str(len(body)),
+        }
+
+        try:
+            resp = self._roundtrip(path, body, headers, timeout=timeout)
+            raw = resp.read()
+        except (http.client.HTTPException, OSError) as e:
+            self._close_conn()
             raise ConnectionError(
-                f"Erro HTTP {e.code} do relogio ({self.device.ip}): {e.reason}\n{error_body}"
+                f"Nao foi possivel conectar ao relogio ({self.device.ip}): {e}"
             )
-        except urllib.error.URLError as e:
+
+        if resp.status >= 400:
+            error_body = raw.decode('utf-8', errors='replace')[:200]
             raise ConnectionError(
-                f"Nao foi possivel conectar ao relogio ({self.device.ip}): {e}"
+                f"Erro HTTP {resp.status} do relogio ({self.device.ip}): {resp.reason}\n{error_body}"
             )
-        except Exception as e:
-            raise ConnectionError(f"Erro na comunicacao: {e}")
-    
+
+        return raw
+
+    def _request(self, endpoint: str, data: dict = None, params: str = "") -> dict:
+        """Faz requisição POST e decodifica a resposta como JSON."""
+        raw = self._request_bytes(endpoint, data, params)
+        if raw and not raw.isspace():
+            try:
+                return _json_loads_mod.loads(raw)
+            except ValueError:
+                # Payload não-JSON (ex.: texto bruto do firmware)
+                return {"raw": raw.decode('utf-8')}
+        return {}
+
     def _request_raw(self, endpoint: str, data: dict = None, params: str = "") -> str:
         """Faz requisição POST e retorna resposta como texto bruto."""
-        url = f"{self.base_url}/{endpoint}"
+        raw = self._request_bytes(endpoint, data, params, timeout=30)
+        return raw.decode('utf-8', errors='replace')
+
+    def _open_stream(self, endpoint: str, params: str = "") -> http.client.HTTPResponse:
+        """Abre a resposta como stream binário, sem materializar o corpo."""
+        path = f"/{endpoint}"
         if params:
-            url += f"?{params}"
-        
-        body = json.dumps(data).encode('utf-8') if data else b'{}'
-        
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={
-                'Content-Type': 'application/json',
-                'Content-Length': str(len(body)),
-            },
-            method='POST'
-        )
-        
-        ctx = self._ssl_ctx if self.device.protocol == 'https' else None
-        
+            path += f"?{params}"
+
+        body = b'{}'
+        headers = {
+            'Content-Type': 'application/json',
+            'Content-Length': str(len(body)),
+        }
+
         try:
-            with urllib.request.urlopen(req, context=ctx, timeout=30) as resp:
-                return resp.read().decode('utf-8', errors='replace')
-        except urllib.error.HTTPError as e:
-            raise ConnectionError(f"Erro HTTP {e.code}: {e.reason}")
-        except urllib.error.URLError as e:
+            resp = self._roundtrip(path, body, headers, timeout=30)
+        except (http.client.HTTPException, OSError) as e:
+            self._close_conn()
             raise ConnectionError(
                 f"Nao foi possivel conectar ao relogio ({self.device.ip}): {e}"
             )
-    
+
+        if resp.status >= 400:
+            resp.read()  # drena para manter a conexão reutilizável
+            raise ConnectionError(f"Erro HTTP {resp.status}: {resp.reason}")
+
+        return resp
+
+    def _probe_login(
+        self, proto: str, port: int, content_type: str
+    ) -> Optional[str]:
+        """
+        Sonda uma combinação (protocolo, porta, content-type) com conexão
+        própria e timeout curto. Retorna a sessão em caso de sucesso.
+        Não toca em self.device nem na conexão persistente — seguro para
+        rodar em paralelo.
+        """
+        if content_type == "form":
+            body = self._login_body_form
+            ct_header = 'application/x-www-form-urlencoded'
+        else:
+            body = self._login_body_json
+            ct_header = 'application/json'
+        headers = {
+            'Content-Type': ct_header,
+            'Content-Length': str(len(body)),
+        }
+
+        if proto == 'https':
+            conn = http.client.HTTPSConnection(
+                self.device.ip, port, context=self._ssl_ctx, timeout=3
+            )
+        else:
+            conn = http.client.HTTPConnection(self.device.ip, port, timeout=3)
+        try:
+            conn.request('POST', '/login.fcgi', body=body, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            if resp.status >= 400 or not raw.strip():
+                return None
+            result = _json_loads_mod.loads(raw)
+            return result.get("session") if isinstance(result, dict) else None
+        except Exception:
+            return None
+        finally:
+            conn.close()
+
     def _auto_detect_protocol(self):
         """
         Tenta detectar automaticamente se o relógio usa HTTPS ou HTTP.
-        Testa HTTPS:443 primeiro, depois HTTP:80.
+        Sonda todas as combinações em paralelo — uma porta inacessível
+        não bloqueia mais as demais pelo timeout inteiro.
         """
         attempts = [
             ("https", 443),
@@ -133,60 +292,89 @@ class ControlIDClient:
             ("https", 4370),
             ("http", 4370),
         ]
-        
         content_types = ["json", "form"]
-        
-        for proto, port in attempts:
-            self.device.protocol = proto
-            self.device.port = port
-            self._update_base_url()
-            
-            for ct in content_types:
-                try:
-                    result = self._login_request(ct)
-                    if "session" in result:
-                        self.device.session = result["session"]
-                        return True, f"Conectado via {proto.upper()}:{port} ({ct})"
-                except Exception:
+        combos = [
+            (proto, port, ct)
+            for proto, port in attempts
+            for ct in content_types
+        ]
+
+        with ThreadPoolExecutor(max_workers=len(combos)) as pool:
+            futures = {
+                pool.submit(self._probe_login, proto, port, ct): (proto, port, ct)
+                for proto, port, ct in combos
+            }
+            for future in as_completed(futures):
+                session = future.result()
+                if not session:
                     continue
-        
+                for other in futures:
+                    other.cancel()
+                proto, port, ct = futures[future]
+                self.device.protocol = proto
+                self.device.port = port
+                self._update_base_url()
+                self.device.session = session
+                self._remember_combo(ct)
+                return True, f"Conectado via {proto.upper()}:{port} ({ct})"
+
         return False, "Nenhum protocolo funcionou"
-    
+
+    def _remember_combo(self, content_type: str):
+        """Persiste a combinação que funcionou para este IP."""
+        cache = _load_device_cache()
+        cache[self.device.ip] = {
+            'protocol': self.device.protocol,
+            'port': self.device.port,
+            'content_type': content_type,
+        }
+        _save_device_cache(cache)
+
+    def _try_cached_combo(self) -> bool:
+        """
+        Tenta a combinação cacheada para este IP, se houver.
+        Remove entradas obsoletas e restaura o device em caso de falha.
+        """
+        cached = _load_device_cache().get(self.device.ip)
+        if not cached:
+            return False
+
+        orig_protocol, orig_port = self.device.protocol, self.device.port
+        try:
+            self.device.protocol = cached['protocol']
+            self.device.port = cached['port']
+            self._update_base_url()
+            result = self._login_request(cached.get('content_type', 'json'))
+            if "session" in result:
+                self.device.session = result["session"]
+                return True
+        except Exception:
+            pass
+
+        # Entrada obsoleta — remove e volta ao fluxo normal
+        cache = _load_device_cache()
+        cache.pop(self.device.ip, None)
+        _save_device_cache(cache)
+        self.device.protocol, self.device.port = orig_protocol, orig_port
+        self._update_base_url()
+        return False
+
     def _login_request(self, content_type: str = "json") -> dict:
         """
         Tenta login com o tipo de conteúdo especificado.
         content_type: 'json' ou 'form'
         """
-        url = f"{self.base_url}/login.fcgi"
-        login_data = {
-            "login": self.device.login,
-            "password": self.device.password
-        }
-        
         if content_type == "form":
-            body = urllib.parse.urlencode(login_data).encode('utf-8')
+            body = self._login_body_form
             ct_header = 'application/x-www-form-urlencoded'
         else:
-            body = json.dumps(login_data).encode('utf-8')
+            body = self._login_body_json
             ct_header = 'application/json'
-        
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={
-                'Content-Type': ct_header,
-                'Content-Length': str(len(body)),
-            },
-            method='POST'
-        )
-        
-        ctx = self._ssl_ctx if self.device.protocol == 'https' else None
-        
-        with urllib.request.urlopen(req, context=ctx, timeout=10) as resp:
-            content = resp.read().decode('utf-8')
-            if content.strip():
-                return json.loads(content)
-            return {}
+
+        raw = self._request_bytes("login.fcgi", body, content_type=ct_header)
+        if raw and not raw.isspace():
+            return _json_loads_mod.loads(raw)
+        return {}
     
     def connect(self) -> bool:
         """
@@ -194,26 +382,27 @@ class ControlIDClient:
         Tenta JSON primeiro, depois form-urlencoded, depois auto-detecção.
         Retorna True se conectou com sucesso.
         """
+        # 0) Combinação que funcionou na última conexão a este IP
+        if self._try_cached_combo():
+            return True
+
         # 1) Tenta JSON (padrão)
         try:
             result = self._login_request("json")
             if "session" in result:
                 self.device.session = result["session"]
+                self._remember_combo("json")
                 return True
-        except urllib.error.HTTPError as e:
-            if e.code == 400:
-                # Firmware pode não aceitar JSON, tenta form-urlencoded
-                pass
-            else:
-                pass
         except Exception:
+            # Firmware pode não aceitar JSON, tenta form-urlencoded
             pass
-        
+
         # 2) Tenta form-urlencoded (firmware antigo do iDClass)
         try:
             result = self._login_request("form")
             if "session" in result:
                 self.device.session = result["session"]
+                self._remember_combo("form")
                 return True
         except Exception:
             pass
@@ -268,21 +457,23 @@ class ControlIDClient:
         if mode:
             params += f"&mode={mode}"
         
-        afd_content = self._request_raw("get_afd.fcgi", params=params)
-        
-        if not afd_content or len(afd_content.strip()) < 10:
-            raise ValueError("AFD vazio — o relogio pode nao ter marcacoes.")
-        
-        # Salva em arquivo
         if not save_path:
             save_path = os.path.join(
                 tempfile.gettempdir(),
                 f"AFD_ControlID_{self.device.ip.replace('.', '_')}.txt"
             )
-        
-        with open(save_path, 'w', encoding='utf-8') as f:
-            f.write(afd_content)
-        
+
+        # Copia em streaming direto para o disco — memória constante,
+        # sem decodificar o AFD inteiro para uma str intermediária.
+        # O primeiro bloco valida o conteúdo antes de tocar o disco.
+        with self._open_stream("get_afd.fcgi", params=params) as resp:
+            first_chunk = resp.read(65536)
+            if len(first_chunk.strip()) < 10:
+                raise ValueError("AFD vazio — o relogio pode nao ter marcacoes.")
+            with open(save_path, 'wb') as f:
+                f.write(first_chunk)
+                shutil.copyfileobj(resp, f, length=65536)
+
         return save_path
     
     def get_employees(self) -> list:
@@ -290,9 +481,10 @@ class ControlIDClient:
         if not self.device.session:
             raise ConnectionError("Nao autenticado. Chame connect() primeiro.")
         
-        result = self._request("load_objects.fcgi", {
-            "object": "users"
-        }, params=f"session={self.device.session}")
+        result = self._request(
+            "load_objects.fcgi", self._USERS_BODY,
+            params=f"session={self.device.session}"
+        )
         
         return result.get("users", [])
     
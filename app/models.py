@@ -2,12 +2,21 @@
 Modelos de dados para o sistema AFD Parser.
 Dataclasses para Employee, Punch, WorkDay, Company e Schedule.
 """
+from collections import namedtuple
 from dataclasses import dataclass, field
 from datetime import datetime, date, time, timedelta
 from typing import Optional, List
 from enum import Enum
 
 
+# Agregados de um funcionário, computados em uma única varredura dos workdays
+EmployeeTotals = namedtuple('EmployeeTotals', [
+    'worked_hours', 'overtime_hours', 'deficit_hours',
+    'late_minutes', 'late_days', 'absent_days',
+    'expected_hours', 'incomplete_days',
+])
+
+
 class ScheduleType(Enum):
     """Tipos de escala CLT suportados."""
     STANDARD = "padrao"       # 8h/dia seg-sex + 4h sáb = 44h/sem
@@ -19,7 +28,7 @@ class ScheduleType(Enum):
     CUSTOM = "personalizada"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScheduleConfig:
     """Configuração de escala de trabalho."""
     schedule_type: ScheduleType = ScheduleType.SCALE_6X1
@@ -46,7 +55,7 @@ class ScheduleConfig:
     workdays: List[int] = field(default_factory=lambda: [0, 1, 2, 3, 4, 5])  # seg-sáb
 
 
-@dataclass
+@dataclass(slots=True)
 class Company:
     """Dados da empresa para o cabeçalho do relatório."""
     name: str = ""
@@ -59,13 +68,31 @@ class Company:
     default_schedule: ScheduleConfig = field(default_factory=ScheduleConfig)
 
 
-@dataclass
+# slots=True: sem __dict__ por instância — milhares de Punch/WorkDay são
+# criados por relatório e o acesso a atributo em classe com slots é mais
+# rápido e ~3x mais compacto, melhorando a localidade dos loops do cálculo.
+# order=True: comparação nativa por (datetime, nsr, pis) — as ordenações
+# do parser/calculador rodam sem key=, direto no sort em C.
+@dataclass(slots=True, order=True)
 class Punch:
     """Uma marcação de ponto individual."""
     datetime: datetime = field(default_factory=datetime.now)
     nsr: str = ""          # Número Sequencial de Registro
     pis: str = ""          # PIS do empregado
-    
+    # Derivados uma única vez na criação — o calculador compara/subtrai
+    # esses ints direto, sem reextrair hora/minuto do datetime por punch.
+    minute_of_day: int = field(init=False, repr=False, compare=False, default=0)
+    wall_seconds: int = field(init=False, repr=False, compare=False, default=0)
+    ym: int = field(init=False, repr=False, compare=False, default=0)
+
+    def __post_init__(self):
+        dt = self.datetime
+        self.ym = dt.year * 12 + dt.month
+        self.minute_of_day = dt.hour * 60 + dt.minute
+        self.wall_seconds = (
+            dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+        )
+
     @property
     def date(self) -> date:
         return self.datetime.date()
@@ -75,7 +102,7 @@ class Punch:
         return self.datetime.time()
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkDay:
     """Resumo de um dia de trabalho de um colaborador."""
     date: date = field(default_factory=date.today)
@@ -117,7 +144,7 @@ class WorkDay:
         return pairs
 
 
-@dataclass
+@dataclass(slots=True)
 class Employee:
     """Dados de um colaborador."""
     pis: str = ""
@@ -127,37 +154,81 @@ class Employee:
     department: str = ""    # Departamento
     schedule: Optional[ScheduleConfig] = None  # Override da escala padrão
     workdays: List[WorkDay] = field(default_factory=list)
-    
+    _totals_cache: Optional[tuple] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+
     @property
     def display_name(self) -> str:
         return self.name if self.name else f"PIS {self.pis}"
-    
+
+    @property
+    def totals(self) -> EmployeeTotals:
+        """
+        Todos os agregados em uma varredura só dos workdays, em vez de
+        seis passadas separadas. Memoizado pelo tamanho da lista —
+        quem editar valores de um dia sem mudar a quantidade de dias
+        precisa setar _totals_cache = None (como fazem o calculador e o
+        editor de marcações da UI).
+        """
+        cached = self._totals_cache
+        n = len(self.workdays)
+        if cached is not None and cached[0] == n:
+            return cached[1]
+
+        worked = overtime = deficit = late_min = expected = 0.0
+        late_days = absent_days = incomplete_days = 0
+        for wd in self.workdays:
+            worked += wd.worked_hours
+            overtime += wd.overtime_hours
+            deficit += wd.deficit_hours
+            late_min += wd.late_minutes
+            expected += wd.expected_hours
+            late_days += wd.is_late
+            absent_days += wd.is_absent
+            incomplete_days += wd.is_incomplete
+
+        totals = EmployeeTotals(
+            worked, overtime, deficit, late_min, late_days, absent_days,
+            expected, incomplete_days
+        )
+        self._totals_cache = (n, totals)
+        return totals
+
     @property
     def total_worked_hours(self) -> float:
-        return sum(wd.worked_hours for wd in self.workdays)
-    
+        return self.totals.worked_hours
+
     @property
     def total_overtime_hours(self) -> float:
-        return sum(wd.overtime_hours for wd in self.workdays)
-    
+        return self.totals.overtime_hours
+
     @property
     def total_deficit_hours(self) -> float:
-        return sum(wd.deficit_hours for wd in self.workdays)
-    
+        return self.totals.deficit_hours
+
     @property
     def total_late_days(self) -> int:
-        return sum(1 for wd in self.workdays if wd.is_late)
-    
+        return self.totals.late_days
+
     @property
     def total_absent_days(self) -> int:
-        return sum(1 for wd in self.workdays if wd.is_absent)
-    
+        return self.totals.absent_days
+
     @property
     def total_late_minutes(self) -> float:
-        return sum(wd.late_minutes for wd in self.workdays)
+        return self.totals.late_minutes
+
+    @property
+    def total_expected_hours(self) -> float:
+        return self.totals.expected_hours
+
+    @property
+    def total_incomplete_days(self) -> int:
+        return self.totals.incomplete_days
 
 
-@dataclass
+@dataclass(slots=True)
 class MonthlyReport:
     """Relatório mensal consolidado."""
     company: Company = field(default_factory=Company)
@@ -14,11 +14,21 @@ Layout ControlID proprietário (ISO):
   Tipo 3 (ponto):  NSR(9) + "3"(1) + datetime(25 ISO8601) + PIS(12)
   Tipo 5 (funcionário): NSR(9) + "5"(1) + datetime(25 ISO8601) + op(1) + PIS(12) + nome(52)
 """
+import mmap
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, date, time
 from typing import Dict, List, Tuple, Optional
 from app.models import Punch, Employee, Company
 
+# Fallback de razão social em cabeçalhos fora do layout — compilado uma vez
+_RAZAO_FALLBACK = re.compile(r'([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-\&]{3,})')
+
+# Teto de erros guardados por parse — um arquivo corrompido inteiro não
+# deve virar dezenas de MB de mensagens formatadas
+_MAX_ERRORS = 100
+
 
 class AFDParser:
     """
@@ -35,7 +45,11 @@ class AFDParser:
     """
     
     # Regex para ISO datetime usado no formato ControlID proprietário
-    ISO_DT_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})([+-]\d{4})')
+    # re.ASCII: \d vira [0-9] puro — casamento mais barato e sem aceitar
+    # dígitos Unicode exóticos em um campo que é sempre ASCII
+    ISO_DT_PATTERN = re.compile(
+        r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})([+-]\d{4})', re.ASCII
+    )
     
     def __init__(self):
         self.punches: List[Punch] = []
@@ -45,9 +59,62 @@ class AFDParser:
         self.total_lines = 0
         self.parsed_lines = 0
         self.format_detected: str = "unknown"  # "portaria671" ou "controlid_iso"
+        # Erros além do teto só são contados (a formatação nem acontece)
+        self._errors_truncated = 0
+        # Índice PIS -> marcações, alimentado durante o parse — evita
+        # varrer self.punches inteiro a cada consulta por funcionário
+        self._punches_by_pis: Dict[str, List[Punch]] = {}
+        # Agregados mantidos incrementalmente no parse, para que
+        # get_date_range/get_month_year_options não varram as marcações
+        self._months_seen: set = set()
+        self._min_dt: Optional[datetime] = None
+        self._max_dt: Optional[datetime] = None
+        # Encoding detectado do arquivo atual, usado só nos campos de texto
+        self._encoding = 'utf-8'
+        self._errors = 'strict'
+        # Handlers especializados por formato — fixados por _set_format na
+        # detecção; até lá, os do layout oficial (nada é despachado antes)
+        self._parse_punch = self._parse_punch_p671
+        self._parse_employee = self._parse_employee_p671
+        # Despacho por tipo de registro — o tipo 3 (maioria das linhas)
+        # tem caminho próprio em _parse_line; aqui ficam os demais
+        self._dispatch = {
+            b'1': self._parse_header,
+            b'2': self._parse_company_change,
+            b'5': self._parse_employee,
+        }
     
     def parse_file(self, filepath: str) -> Tuple[Dict[str, Employee], Company]:
-        """Lê e processa um arquivo AFD completo."""
+        """Lê e processa um arquivo AFD completo em uma única passada."""
+        self._reset()
+
+        try:
+            self._parse_stream(filepath, self._sniff_encoding(filepath))
+        except UnicodeDecodeError:
+            # O sniff de 4 KB não viu o byte problemático — reprocessa
+            # como latin-1 (decodifica qualquer byte)
+            self._reset()
+            try:
+                self._parse_stream(filepath, 'latin-1', errors='replace')
+            except Exception as e:
+                self.errors.append(f"Erro ao ler arquivo: {str(e)}")
+        except FileNotFoundError:
+            self.errors.append(f"Arquivo não encontrado: {filepath}")
+        except Exception as e:
+            self.errors.append(f"Erro ao ler arquivo: {str(e)}")
+
+        # Ordena marcações por data/hora — a lista global e cada lista
+        # do índice por PIS (ordenadas uma vez, consultadas N vezes)
+        # Punch é ordenável (order=True) — sort sem key=, sem chamar
+        # função Python por elemento; desempate estável por NSR
+        self.punches.sort()
+        for punch_list in self._punches_by_pis.values():
+            punch_list.sort()
+
+        return self.employees, self.company
+
+    def _reset(self):
+        """Limpa o estado para um novo parse."""
         self.punches = []
         self.employees = {}
         self.company = Company()
@@ -55,126 +122,197 @@ class AFDParser:
         self.total_lines = 0
         self.parsed_lines = 0
         self.format_detected = "unknown"
-        
-        content = self._read_file(filepath)
-        if content is None:
-            return self.employees, self.company
-        
-        self.total_lines = len(content)
-        
-        # Auto-detecção do formato
-        self._detect_format(content)
-        
-        for line_num, line in enumerate(content, 1):
-            line = line.strip()
-            if not line:
-                continue
-            
+        self._parse_punch = self._parse_punch_p671
+        self._parse_employee = self._parse_employee_p671
+        self._dispatch[b'5'] = self._parse_employee
+        self._errors_truncated = 0
+        self._punches_by_pis = {}
+        self._months_seen = set()
+        self._min_dt = None
+        self._max_dt = None
+
+    def _sniff_encoding(self, filepath: str) -> str:
+        """Detecta o encoding com uma amostra dos primeiros 4 KB.
+
+        Um BOM UTF-8 no início decide na hora (alguns editores salvam o
+        AFD assim); sem BOM, tenta decodificar a amostra como UTF-8 e cai
+        para latin-1 se falhar de verdade.
+        """
+        with open(filepath, 'rb') as f:
+            sniff = f.read(4096)
+        if sniff.startswith(b'\xef\xbb\xbf'):
+            return 'utf-8'
+        try:
+            sniff.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            if e.start >= len(sniff) - 4:
+                # Sequência multibyte truncada na borda da amostra
+                return 'utf-8'
+            return 'latin-1'
+
+    def _decode_text(self, raw: bytes) -> str:
+        """Decodifica um campo de texto (razão social, nome) do AFD."""
+        return raw.decode(self._encoding, self._errors)
+
+    # Tipos de registro que realmente viram dados — o resto (ajuste de
+    # relógio, eventos de sistema, trailer) é descartado ainda em bytes
+    _PARSED_TYPES = (b'1', b'2', b'3', b'5')
+
+    def _parse_stream(self, filepath: str, encoding: str, errors: str = 'strict'):
+        """
+        Itera o arquivo via mmap, linha a linha — o conteúdo fica no page
+        cache, sem materializar a lista inteira nem varrê-la mais de uma
+        vez. As linhas seguem como bytes até o parse dos campos; enquanto
+        o formato não é conhecido, ficam num buffer pequeno processado na
+        detecção.
+        """
+        self._encoding = encoding
+        self._errors = errors
+        pending: List[Tuple[int, bytes]] = []
+        with open(filepath, 'rb') as f:
             try:
-                self._parse_line(line, line_num)
-                self.parsed_lines += 1
-            except Exception as e:
-                self.errors.append(f"Linha {line_num}: {str(e)}")
-        
-        # Ordena marcações por data/hora
-        self.punches.sort(key=lambda p: p.datetime)
-        
-        return self.employees, self.company
-    
-    def _read_file(self, filepath: str) -> Optional[List[str]]:
-        """Lê o arquivo tentando diferentes encodings."""
-        for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                mm = None  # arquivo vazio
+            buf = mm if mm is not None else f
+            # BOM UTF-8 não faz parte do primeiro registro — pula os
+            # 3 bytes para não deslocar as posições fixas da linha 1
+            if mm is not None and mm[:3] == b'\xef\xbb\xbf':
+                mm.seek(3)
             try:
-                with open(filepath, 'r', encoding=encoding) as f:
-                    return f.readlines()
-            except UnicodeDecodeError:
-                continue
-            except FileNotFoundError:
-                self.errors.append(f"Arquivo não encontrado: {filepath}")
-                return None
-            except Exception as e:
-                self.errors.append(f"Erro ao ler arquivo: {str(e)}")
-                return None
-        
-        # Fallback
-        try:
-            with open(filepath, 'r', encoding='latin-1', errors='replace') as f:
-                return f.readlines()
-        except Exception as e:
-            self.errors.append(f"Erro ao ler arquivo: {str(e)}")
-            return None
-    
-    def _detect_format(self, lines: List[str]):
+                # Ligações locais para o loop quente — cada linha evita
+                # os LOAD_ATTR de self/método do interpretador
+                readline = buf.readline
+                parsed_types = self._PARSED_TYPES
+                dispatch_line = self._dispatch_line
+                line_num = 0
+                for raw in iter(readline, b''):
+                    line_num += 1
+                    # Só o terminador sai — strip() completo varreria a
+                    # linha pelas duas pontas atrás de espaços que o
+                    # layout de posições fixas nem permite no início
+                    raw = raw.rstrip(b'\r\n')
+                    if not raw:
+                        continue
+                    if self.format_detected == "unknown":
+                        self._detect_from_line(line_num, raw, pending)
+                        continue
+                    if (raw[9:10] not in parsed_types
+                            or raw[:9] == b'999999999'):
+                        self.parsed_lines += 1  # processada (ignorada por tipo)
+                        continue
+                    dispatch_line(raw, line_num)
+            finally:
+                self.total_lines = line_num
+                if mm is not None:
+                    mm.close()
+
+        if self.format_detected == "unknown":
+            # Arquivo sem registro tipo 3 — assume o padrão oficial
+            self._set_format("portaria671")
+            self._flush_pending(pending)
+
+    def _detect_from_line(
+        self, line_num: int, line: bytes, pending: List[Tuple[int, bytes]]
+    ):
         """
-        Detecta se é formato Portaria 671 (padrão) ou ControlID proprietário (ISO).
-        
-        Regra:
-        - Se a primeira linha contém "REP_C" ou "REP-C" → Portaria 671
-        - Se encontra ISO datetime (yyyy-mm-ddT...) nos registros tipo 3 → ControlID ISO
-        - Caso contrário → Portaria 671 (padrão)
+        Detecção incremental do formato, resolvida na primeira linha
+        conclusiva:
+        - Primeira linha com "REP_C"/"REP-C" → Portaria 671
+        - Primeiro tipo 3 com ISO datetime (yyyy-mm-ddT...) → ControlID ISO
+        - Primeiro tipo 3 sem ISO → Portaria 671 (padrão)
         """
-        # Checa se o cabeçalho (primeira linha) indica REP-C
-        if lines:
-            first_line = lines[0].strip().upper()
-            if 'REP_C' in first_line or 'REP-C' in first_line:
-                self.format_detected = "portaria671"
-                return
-        
-        # Procura pela primeira linha de marcação (tipo 3)
-        for line in lines:
-            line = line.strip()
-            if len(line) < 20:
-                continue
-            
-            record_type = line[9] if len(line) > 9 else ''
-            
-            if record_type == '3':
-                # Verifica se após o tipo '3' tem ISO datetime (ControlID proprietário)
-                after_type = line[10:35]
-                if self.ISO_DT_PATTERN.match(after_type):
-                    self.format_detected = "controlid_iso"
-                else:
-                    # Verifica se parece ter data compacta ddmmaaaa
-                    date_part = line[10:18]
-                    if date_part.isdigit() and len(date_part) == 8:
-                        self.format_detected = "portaria671"
-                    else:
-                        self.format_detected = "portaria671"
+        pending.append((line_num, line))
+
+        if line_num == 1:
+            first_line = line.upper()
+            if b'REP_C' in first_line or b'REP-C' in first_line:
+                self._set_format("portaria671")
+                self._flush_pending(pending)
                 return
-        
-        # Default
-        self.format_detected = "portaria671"
-    
-    def _parse_line(self, line: str, line_num: int):
-        """Identifica o tipo de registro e delega o parse."""
+
+        if len(line) >= 20 and line[9:10] == b'3':
+            # Verifica se após o tipo '3' tem ISO datetime (ControlID proprietário)
+            if self.ISO_DT_PATTERN.match(line[10:35].decode('ascii', 'replace')):
+                self._set_format("controlid_iso")
+            else:
+                self._set_format("portaria671")
+            self._flush_pending(pending)
+            return
+
+        # 200 linhas sem nenhum tipo 3 conclusivo: assume o layout oficial
+        # em vez de seguir acumulando o arquivo inteiro no buffer
+        if line_num >= 200:
+            self._set_format("portaria671")
+            self._flush_pending(pending)
+
+    def _set_format(self, fmt: str):
+        """
+        Fixa o formato detectado e especializa os handlers de registro.
+        O teste de layout sai do caminho por linha: cada variante parseia
+        só as posições do seu formato, sem reavaliar format_detected.
+        """
+        self.format_detected = fmt
+        if fmt == "controlid_iso":
+            self._parse_punch = self._parse_punch_iso
+            self._parse_employee = self._parse_employee_iso
+        else:
+            self._parse_punch = self._parse_punch_p671
+            self._parse_employee = self._parse_employee_p671
+        self._dispatch[b'5'] = self._parse_employee
+
+    def _flush_pending(self, pending: List[Tuple[int, bytes]]):
+        """Processa as linhas acumuladas durante a detecção de formato."""
+        for line_num, line in pending:
+            self._dispatch_line(line, line_num)
+        pending.clear()
+
+    def _dispatch_line(self, line: bytes, line_num: int):
+        """Processa uma linha já normalizada, capturando erros por linha."""
+        try:
+            self._parse_line(line, line_num)
+            self.parsed_lines += 1
+        except UnicodeDecodeError:
+            raise  # encoding errado — parse_file reprocessa como latin-1
+        except Exception as e:
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(f"Linha {line_num}: {str(e)}")
+            else:
+                self._errors_truncated += 1
+
+    def _parse_line(self, line: bytes, line_num: int):
+        """Identifica o tipo de registro e delega o parse.
+
+        Opera em bytes — só os campos que viram dados são decodificados.
+        """
         if len(line) < 10:
             return
-        
+
         # Trailer/rodapé
-        if line.startswith('999999999'):
+        if line.startswith(b'999999999'):
             return
-        
-        # Linha de assinatura/checksum
-        if '==' in line and len(line) < 120:
+
+        # Assinatura/checksum e afins: registro válido sempre começa com
+        # NSR de 9 dígitos — um isdigit no prefixo descarta sem varrer a
+        # linha inteira atrás de '=='
+        if not line[:9].isdigit():
             return
-        
-        nsr = line[:9].strip()
-        record_type = line[9] if len(line) > 9 else ''
-        
-        if record_type == '1':
-            self._parse_header(line)
-        elif record_type == '2':
-            self._parse_company_change(line)
-        elif record_type == '3':
+
+        nsr = line[:9].decode('ascii', 'replace').strip()
+        record_type = line[9:10]
+
+        if record_type == b'3':
+            # Caminho quente: a imensa maioria das linhas é marcação
             self._parse_punch(line, nsr)
-        elif record_type == '4':
-            pass  # Ajuste de relógio — apenas auditoria
-        elif record_type == '5':
-            self._parse_employee(line, nsr)
-        elif record_type == '6':
-            pass  # Evento de sistema ControlID — ignorar
+            return
+
+        handler = self._dispatch.get(record_type)
+        if handler is not None:
+            handler(line, nsr)
+        # Tipos 4 (ajuste de relógio) e 6 (evento de sistema) — ignorados
     
-    def _parse_header(self, line: str):
+    def _parse_header(self, line: bytes, nsr: str = ""):
         """
         Registro Tipo 1 — Cabeçalho.
         
@@ -189,28 +327,29 @@ class AFDParser:
         NSR(9) + "1"(1) + CNPJ(14) + zeros(14) + razão(150) + ...
         """
         try:
+            decode = self._decode_text
             if self.format_detected == "controlid_iso":
-                cnpj_raw = line[10:24].strip()
-                razao = line[39:189].strip() if len(line) > 39 else ''
+                cnpj_raw = line[10:24].decode('ascii', 'replace').strip()
+                razao = decode(line[39:189]).strip() if len(line) > 39 else ''
             else:
                 # Portaria 671 standard
                 # Posição 10: tipo ID (1 char)
                 # Posição 11-24: CNPJ (14 chars)
                 # Posição 25-36: CEI (12 chars)
                 # Posição 37-186: Razão Social (150 chars)
-                tipo_id = line[10] if len(line) > 10 else ''
-                cnpj_raw = line[11:25].strip()
-                razao = line[37:187].strip() if len(line) > 37 else ''
-                
+                cnpj_raw = line[11:25].decode('ascii', 'replace').strip()
+                razao = decode(line[37:187]).strip() if len(line) > 37 else ''
+
                 # Se não achou razão na posição padrão, tenta buscar texto
                 if not razao:
-                    rest = line[25:]
-                    match = re.search(r'([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-\&]{3,})', rest)
+                    match = _RAZAO_FALLBACK.search(decode(line[25:]))
                     if match:
                         razao = match.group(1).strip()
-            
+
             if cnpj_raw:
-                digits = re.sub(r'\D', '', cnpj_raw)[:14]
+                # CNPJs de AFD já vêm numéricos — filter(str.isdigit, ...)
+                # roda inteiro em C, sem frame de generator por caractere
+                digits = ''.join(filter(str.isdigit, cnpj_raw))[:14]
                 if len(digits) == 14:
                     self.company.cnpj = (
                         f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/"
@@ -223,134 +362,180 @@ class AFDParser:
         except Exception:
             pass
     
-    def _parse_company_change(self, line: str):
+    def _parse_company_change(self, line: bytes, nsr: str = ""):
         """Registro Tipo 2 — Alteração de empresa."""
         pass
-    
-    def _parse_punch(self, line: str, nsr: str):
+
+    def _parse_punch_iso(self, line: bytes, nsr: str):
         """
-        Registro Tipo 3 — Marcação de Ponto.
-        
-        Portaria 671 (34+ chars):
-        NSR(9) + "3"(1) + data(8 ddmmaaaa) + hora(4 hhmm) + PIS(12)
-        Posição 10-17: data
-        Posição 18-21: hora
-        Posição 22-33: PIS
-        
-        ControlID ISO (46+ chars):
+        Registro Tipo 3 — Marcação de Ponto (ControlID ISO, 46+ chars).
+
         NSR(9) + "3"(1) + datetime(24 ISO8601) + PIS(12)
         Posição 10-33: datetime (24 chars: 2026-01-08T09:15:00-0300)
         Posição 34-45: PIS
         """
         try:
-            if self.format_detected == "controlid_iso":
-                # ControlID proprietário: ISO datetime (24 chars)
-                dt_str = line[10:34]
-                match = self.ISO_DT_PATTERN.match(dt_str)
-                if not match:
-                    return
-                
-                year = int(match.group(1))
-                month = int(match.group(2))
-                day = int(match.group(3))
-                hour = int(match.group(4))
-                minute = int(match.group(5))
-                
-                pis = line[34:46].strip()
-            else:
-                # Portaria 671: posições fixas
-                date_str = line[10:18]   # ddmmaaaa (8 chars)
-                time_str = line[18:22]   # hhmm (4 chars)
-                pis = line[22:34].strip()  # PIS (12 chars)
-                
-                day = int(date_str[0:2])
-                month = int(date_str[2:4])
-                year = int(date_str[4:8])
-                hour = int(time_str[0:2])
-                minute = int(time_str[2:4])
-            
-            if not pis:
-                return
-            
-            # Validações
-            if not (1 <= day <= 31 and 1 <= month <= 12 and 2000 <= year <= 2100):
+            # ControlID proprietário: datetime ISO de largura fixa.
+            # fromisoformat (parser em C no 3.11) monta o datetime direto
+            # da fatia aaaa-mm-ddThh:mm — sem segundos nem offset, que o
+            # cálculo de jornada ignora; o regex fica só na detecção
+            if len(line) < 34 or line[14:15] != b'-' or line[20:21] != b'T':
                 return
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
+
+            dt = datetime.fromisoformat(line[10:26].decode('ascii'))
+            if not (2000 <= dt.year <= 2100):
                 return
-            
-            punch = Punch(
-                datetime=datetime(year, month, day, hour, minute),
-                nsr=nsr,
-                pis=pis
-            )
-            
-            self.punches.append(punch)
-            
-            if pis not in self.employees:
-                self.employees[pis] = Employee(pis=pis)
-                
+
+            # sys.intern: cada PIS vira uma string única compartilhada —
+            # milhares de marcações do mesmo funcionário apontam para o
+            # mesmo objeto e as consultas no dict comparam por identidade
+            pis = sys.intern(line[34:46].decode('ascii', 'replace').strip())
+            self._record_punch(nsr, pis, dt)
         except (ValueError, IndexError) as e:
-            self.errors.append(f"Registro tipo 3 (NSR {nsr}): {e}")
-    
-    def _parse_employee(self, line: str, nsr: str):
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(f"Registro tipo 3 (NSR {nsr}): {e}")
+            else:
+                self._errors_truncated += 1
+
+    def _parse_punch_p671(self, line: bytes, nsr: str):
         """
-        Registro Tipo 5 — Cadastro de Funcionário.
-        
-        Portaria 671:
+        Registro Tipo 3 — Marcação de Ponto (Portaria 671, 34+ chars).
+
+        NSR(9) + "3"(1) + data(8 ddmmaaaa) + hora(4 hhmm) + PIS(12)
+        Posição 10-17: data
+        Posição 18-21: hora
+        Posição 22-33: PIS
+        """
+        # Validação antecipada: com o bloco conferido por isdigit, o int()
+        # abaixo nunca levanta — exceção fica só para o que é de fato
+        # excepcional (ex.: data de calendário inválida)
+        stamp = line[10:22]
+        if not stamp.isdigit():
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(
+                    f"Registro tipo 3 (NSR {nsr}): data/hora não numérica"
+                )
+            else:
+                self._errors_truncated += 1
+            return
+
+        try:
+            # PIS (12 chars), internado — ver _parse_punch_iso
+            pis = sys.intern(line[22:34].decode('ascii', 'replace').strip())
+
+            # ddmmaaaahhmm convertido de uma vez e decomposto por
+            # divmod — 1 int() em vez de 5 fatias+int por marcação
+            v = int(stamp)
+            v, minute = divmod(v, 100)
+            v, hour = divmod(v, 100)
+            v, year = divmod(v, 10000)
+            day, month = divmod(v, 100)
+
+            self._add_punch(nsr, pis, year, month, day, hour, minute)
+        except (ValueError, IndexError) as e:
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(f"Registro tipo 3 (NSR {nsr}): {e}")
+            else:
+                self._errors_truncated += 1
+
+    def _add_punch(self, nsr, pis, year, month, day, hour, minute):
+        """Valida os campos extraídos e materializa a marcação."""
+        # Validações
+        if not (1 <= day <= 31 and 1 <= month <= 12 and 2000 <= year <= 2100):
+            return
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            return
+
+        self._record_punch(nsr, pis, datetime(year, month, day, hour, minute))
+
+    def _record_punch(self, nsr: str, pis: str, dt: datetime):
+        """Materializa a marcação e atualiza os agregados incrementais."""
+        if not pis:
+            return
+
+        punch = Punch(datetime=dt, nsr=nsr, pis=pis)
+
+        self._months_seen.add((dt.month, dt.year))
+        if self._min_dt is None:
+            self._min_dt = self._max_dt = dt
+        elif dt < self._min_dt:
+            self._min_dt = dt
+        elif dt > self._max_dt:
+            self._max_dt = dt
+
+        self.punches.append(punch)
+        self._punches_by_pis.setdefault(pis, []).append(punch)
+
+        # Uma consulta só ao dict no caso comum (PIS já registrado)
+        if self.employees.get(pis) is None:
+            self.employees[pis] = Employee(pis=pis)
+
+    def _parse_employee_iso(self, line: bytes, nsr: str):
+        """
+        Registro Tipo 5 — Cadastro de Funcionário (ControlID ISO).
+
+        NSR(9) + "5"(1) + datetime(24) + op(1) + PIS(12) + Nome(52)
+        Posição 34: operação
+        Posição 35-46: PIS
+        Posição 47-98: Nome
+        """
+        pis = sys.intern(line[35:47].decode('ascii', 'replace').strip())
+        name = (
+            self._decode_text(line[47:99]).strip()
+            if len(line) > 47 else ''
+        )
+        self._register_employee(pis, name, nsr)
+
+    def _parse_employee_p671(self, line: bytes, nsr: str):
+        """
+        Registro Tipo 5 — Cadastro de Funcionário (Portaria 671).
+
         NSR(9) + "5"(1) + data(8) + hora(4) + op(1) + PIS(12) + Nome(52)
         Posição 10-17: data (8 chars)
         Posição 18-21: hora (4 chars)
         Posição 22: operação (1 char: I/A/E)
         Posição 23-34: PIS (12 chars)
         Posição 35-86: Nome (52 chars)
-        
-        ControlID ISO:
-        NSR(9) + "5"(1) + datetime(24) + op(1) + PIS(12) + Nome(52)
-        Posição 34: operação
-        Posição 35-46: PIS
-        Posição 47-98: Nome
         """
+        pis = sys.intern(line[23:35].decode('ascii', 'replace').strip())
+        name = (
+            self._decode_text(line[35:87]).strip()
+            if len(line) > 35 else ''
+        )
+        self._register_employee(pis, name, nsr)
+
+    def _register_employee(self, pis: str, name: str, nsr: str):
+        """Cria/atualiza o funcionário a partir de um registro tipo 5."""
         try:
-            if self.format_detected == "controlid_iso":
-                op = line[34] if len(line) > 34 else ''
-                pis = line[35:47].strip()
-                name = line[47:99].strip() if len(line) > 47 else ''
-            else:
-                # Portaria 671: posições fixas oficiais
-                op = line[22] if len(line) > 22 else ''
-                pis = line[23:35].strip()
-                name = line[35:87].strip() if len(line) > 35 else ''
-            
             if pis:
-                if pis not in self.employees:
-                    self.employees[pis] = Employee(pis=pis)
+                emp = self.employees.get(pis)
+                if emp is None:
+                    emp = Employee(pis=pis)
+                    self.employees[pis] = emp
                 if name:
-                    self.employees[pis].name = name
-                    
+                    emp.name = name
+
+        except UnicodeDecodeError:
+            raise  # encoding errado — parse_file reprocessa como latin-1
         except (ValueError, IndexError) as e:
-            self.errors.append(f"Registro tipo 5 (NSR {nsr}): {e}")
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(f"Registro tipo 5 (NSR {nsr}): {e}")
+            else:
+                self._errors_truncated += 1
     
     def get_punches_by_pis(self, pis: str) -> List[Punch]:
         """Retorna todas as marcações de um PIS, ordenadas por data/hora."""
-        result = [p for p in self.punches if p.pis == pis]
-        result.sort(key=lambda p: p.datetime)
-        return result
+        return self._punches_by_pis.get(pis, [])
     
     def get_date_range(self) -> Tuple[Optional[date], Optional[date]]:
         """Retorna a data mais antiga e mais recente das marcações."""
-        if not self.punches:
+        if self._min_dt is None:
             return None, None
-        dates = [p.date for p in self.punches]
-        return min(dates), max(dates)
-    
+        return self._min_dt.date(), self._max_dt.date()
+
     def get_month_year_options(self) -> List[Tuple[int, int]]:
         """Retorna lista de (mês, ano) disponíveis nas marcações."""
-        if not self.punches:
-            return []
-        months = set()
-        for p in self.punches:
-            months.add((p.datetime.month, p.datetime.year))
-        return sorted(months, key=lambda x: (x[1], x[0]))
+        return sorted(self._months_seen, key=lambda x: (x[1], x[0]))
     
     def get_summary(self) -> dict:
         """Retorna resumo do arquivo parseado."""
@@ -364,7 +549,7 @@ class AFDParser:
             'date_end': date_end,
             'company_name': self.company.name,
             'company_cnpj': self.company.cnpj,
-            'errors': len(self.errors),
+            'errors': len(self.errors) + self._errors_truncated,
             'months_available': self.get_month_year_options(),
             'format': self.format_detected,
             'employees': {
@@ -372,3 +557,58 @@ class AFDParser:
                 for pis, emp in self.employees.items()
             }
         }
+
+
+def _parse_one(filepath: str) -> Tuple[Dict[str, Employee], Company]:
+    """Parseia um AFD em um processo worker (precisa ser top-level)."""
+    parser = AFDParser()
+    return parser.parse_file(filepath)
+
+
+def parse_many(
+    filepaths: List[str], max_workers: Optional[int] = None
+) -> Dict[str, Tuple[Dict[str, Employee], Company]]:
+    """
+    Parseia vários AFDs em paralelo (um processo por arquivo) — útil em
+    instalações com mais de um relógio. O parse é CPU-bound em Python
+    puro, então processos escalam com os núcleos disponíveis.
+
+    Retorna {filepath: (employees, company)} na mesma estrutura de
+    parse_file. Com um único arquivo, parseia inline sem criar pool.
+
+    No exe PyInstaller o spawn do Windows exige
+    multiprocessing.freeze_support() no entry point (já chamado no
+    main.py) — sem isso os workers reabririam o aplicativo.
+    """
+    if len(filepaths) <= 1:
+        return {fp: _parse_one(fp) for fp in filepaths}
+
+    results: Dict[str, Tuple[Dict[str, Employee], Company]] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_parse_one, fp): fp for fp in filepaths}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def merge_parsed(
+    results: Dict[str, Tuple[Dict[str, Employee], Company]]
+) -> Tuple[Dict[str, Employee], Company]:
+    """
+    Consolida os resultados de parse_many em um cadastro único — fase de
+    merge do parse paralelo. Funcionários são unificados por PIS (o nome
+    preenchido vence o vazio); a empresa vem do primeiro arquivo que
+    trouxe cabeçalho.
+    """
+    merged: Dict[str, Employee] = {}
+    company = Company()
+    for employees, comp in results.values():
+        if not company.cnpj and comp.cnpj:
+            company = comp
+        for pis, emp in employees.items():
+            current = merged.get(pis)
+            if current is None:
+                merged[pis] = emp
+            elif emp.name and not current.name:
+                current.name = emp.name
+    return merged, company
@@ -4,8 +4,11 @@ Layout inspirado no ControlID RHiD com cabeçalho vermelho,
 bloco de dados da empresa, horário de trabalho e tabela detalhada.
 """
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, time, datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from fpdf import FPDF
 from app.models import MonthlyReport, Employee, WorkDay, Company, ScheduleConfig
 
@@ -19,6 +22,52 @@ BLACK = (0, 0, 0)
 GRAY_TEXT = (100, 100, 100)
 BLUE_HEADER = (25, 25, 112)
 
+# Abreviações dos dias da semana (0=segunda) — constante de módulo; a
+# tabela desenha uma linha por dia e não realoca a lista a cada chamada
+DAY_NAMES = ('SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SÁB', 'DOM')
+
+# Caracteres inválidos em nome de arquivo — compilado uma vez; precisa de
+# regex (e não translate) porque \w cobre os acentos dos nomes
+_SAFE_RE = re.compile(r'[^\w\s\-]')
+
+
+# Colunas da tabela de marcações (rótulo, largura em mm) — o cabeçalho é
+# redesenhado a cada quebra de página e a spec nunca muda
+_TABLE_COLS = (
+    ('DIA', 20),
+    ('PREVISTO', 24),
+    ('ENT. 1', 14),
+    ('SAÍ. 1', 14),
+    ('ENT. 2', 14),
+    ('SAÍ. 2', 14),
+    ('TRAB.', 14),
+    ('FALTA/ATRASO', 24),
+    ('EXTRA', 14),
+    ('BANCO', 14),
+    ('OBS.', 34),
+)
+
+
+def _punch_hhmm(p) -> str:
+    """Hora de uma marcação como HH:MM — f-string direto do minuto do
+    dia pré-calculado, bem mais barato que strftime."""
+    h, m = divmod(p.minute_of_day, 60)
+    return f"{h:02d}:{m:02d}"
+
+
+@lru_cache(maxsize=1)
+def _font_paths() -> Tuple[Optional[str], Optional[str]]:
+    """
+    Resolve e valida os caminhos das fontes DejaVu uma única vez por
+    processo — sem refazer join + stat duplo a cada PDF gerado.
+    """
+    assets = os.path.join(os.path.dirname(__file__), '..', 'assets')
+    reg = os.path.join(assets, 'DejaVuSans.ttf')
+    bold = os.path.join(assets, 'DejaVuSans-Bold.ttf')
+    if os.path.exists(reg) and os.path.exists(bold):
+        return reg, bold
+    return None, None
+
 
 class PontoPDF(FPDF):
     """PDF customizado — Cartão de Ponto estilo ControlID."""
@@ -30,42 +79,87 @@ class PontoPDF(FPDF):
         self.schedule = schedule or ScheduleConfig()
         self.set_auto_page_break(auto=True, margin=15)
         
-        # Fontes
-        assets = os.path.join(os.path.dirname(__file__), '..', 'assets')
-        font_reg = os.path.join(assets, 'DejaVuSans.ttf')
-        font_bold = os.path.join(assets, 'DejaVuSans-Bold.ttf')
-        
-        if os.path.exists(font_reg) and os.path.exists(font_bold):
-            self.add_font('DejaVu', '', font_reg, uni=True)
-            self.add_font('DejaVu', 'B', font_bold, uni=True)
+        # Fontes — caminhos resolvidos uma vez por processo
+        font_reg, font_bold = _font_paths()
+
+        if font_reg is not None:
+            # fpdf2: fontes TrueType são sempre unicode — o uni= legado
+            # só gera DeprecationWarning
+            self.add_font('DejaVu', '', font_reg)
+            self.add_font('DejaVu', 'B', font_bold)
             self.has_dejavu = True
         else:
             self.has_dejavu = False
+
+        # A família é invariante pelo resto da vida do documento — decide
+        # aqui e memoiza o último (estilo, tamanho) aplicado para que as
+        # trocas redundantes (toda linha repete '', 6.5) nem chamem set_font
+        self._family = 'DejaVu' if self.has_dejavu else 'Helvetica'
+        self._font_key = None
+        self._text_rgb = None
+        self._fill_rgb = None
+
+        # Carimbo de emissão único para o documento inteiro — formata uma
+        # vez e todas as páginas mostram o mesmo horário
+        self._emitted_at = datetime.now().strftime('%d/%m/%Y às %H:%M')
+
+        # Logo validado uma vez — header() roda a cada página e não deve
+        # repetir o stat no disco (o decode do arquivo o fpdf2 já cacheia
+        # por documento)
+        logo = company.logo_path
+        self._logo_path = logo if logo and os.path.exists(logo) else None
+
+        # Rótulos de horário do quadro lateral — a escala é a mesma em
+        # todas as páginas do documento; formata uma vez aqui em vez de
+        # chamar strftime quatro vezes por página
+        sched = self.schedule
+        self._schedule_labels = (
+            sched.entry_time.strftime('%H:%M'),
+            sched.exit_time.strftime('%H:%M'),
+            f"{sched.break_start.hour - 2} ou {sched.break_start.hour}h",
+            f"{sched.break_end.hour - 2} ou {sched.break_end.hour}h",
+            sched.saturday_entry.strftime('%H:%M'),
+            sched.saturday_exit.strftime('%H:%M'),
+        )
     
     def _font(self, style='', size=8):
-        if self.has_dejavu:
-            self.set_font('DejaVu', style, size)
-        else:
-            self.set_font('Helvetica', style, size)
+        key = (style, size)
+        if key != self._font_key:
+            self._font_key = key
+            self.set_font(self._family, style, size)
+
+    # Mesmo princípio do _font: trocas de cor para o valor já vigente nem
+    # chegam no fpdf (que emitiria operadores repetidos no stream)
+    def _text_color(self, r, g, b):
+        rgb = (r, g, b)
+        if rgb != self._text_rgb:
+            self._text_rgb = rgb
+            self.set_text_color(r, g, b)
+
+    def _fill_color(self, r, g, b):
+        rgb = (r, g, b)
+        if rgb != self._fill_rgb:
+            self._fill_rgb = rgb
+            self.set_fill_color(r, g, b)
     
     def header(self):
         """Cabeçalho: Cartão de Ponto vermelho + período."""
         # Barra vermelha
-        self.set_fill_color(*RED)
+        self._fill_color(*RED)
         self.rect(10, 8, 190, 12, 'F')
         
         # Logo da empresa (se existir)
         x_logo = 12
-        if self.company.logo_path and os.path.exists(self.company.logo_path):
+        if self._logo_path:
             try:
-                self.image(self.company.logo_path, x_logo, 8.5, 11, 11)
+                self.image(self._logo_path, x_logo, 8.5, 11, 11)
                 x_logo = 25
             except Exception:
                 pass
         
         # Título "Cartão de Ponto"
         self.set_xy(x_logo, 9)
-        self.set_text_color(*WHITE)
+        self._text_color(*WHITE)
         self._font('B', 13)
         self.cell(60, 5, 'Cartão de Ponto', align='L')
         
@@ -82,20 +176,19 @@ class PontoPDF(FPDF):
         # Data de emissão
         self.set_xy(150, 14)
         self._font('', 6)
-        now = datetime.now().strftime('%d/%m/%Y às %H:%M')
-        self.cell(50, 3, f'Emitido em {now}', align='R')
+        self.cell(50, 3, f'Emitido em {self._emitted_at}', align='R')
         
-        self.set_text_color(*BLACK)
+        self._text_color(*BLACK)
         self.set_y(22)
     
     def footer(self):
         """Rodapé com branding."""
         self.set_y(-10)
         self._font('', 6)
-        self.set_text_color(150, 150, 150)
+        self._text_color(150, 150, 150)
         self.cell(95, 5, 'Bit-Converter — BitKaiser Solution', align='L')
         self.cell(95, 5, 'www.bitkaiser.com.br', align='R')
-        self.set_text_color(*BLACK)
+        self._text_color(*BLACK)
 
 
 class PDFExporter:
@@ -107,10 +200,7 @@ class PDFExporter:
     def _ensure_fonts(self):
         assets_dir = os.path.join(os.path.dirname(__file__), '..', 'assets')
         os.makedirs(assets_dir, exist_ok=True)
-        self.fonts_available = (
-            os.path.exists(os.path.join(assets_dir, 'DejaVuSans.ttf')) and
-            os.path.exists(os.path.join(assets_dir, 'DejaVuSans-Bold.ttf'))
-        )
+        self.fonts_available = _font_paths()[0] is not None
     
     def export_individual(
         self, 
@@ -120,21 +210,38 @@ class PDFExporter:
         """Exporta um PDF para cada colaborador."""
         os.makedirs(output_dir, exist_ok=True)
         generated = []
-        schedule = report.company.default_schedule
-        
+
+        jobs = []
         for employee in report.employees:
             filename = self._safe_filename(employee.display_name)
             filepath = os.path.join(
-                output_dir, 
+                output_dir,
                 f"Ponto_{filename}_{report.month:02d}_{report.year}.pdf"
             )
-            
-            pdf = PontoPDF(report.company, report.period_label, schedule)
-            pdf.alias_nb_pages()
-            self._add_employee_pages(pdf, report, employee)
-            pdf.output(filepath)
-            generated.append(filepath)
-        
+            jobs.append((employee, filepath))
+
+        # A renderização é CPU-bound em Python puro e um PDF não depende
+        # do outro — com folhas de ponto grandes, um processo por núcleo;
+        # poucos funcionários não pagam o custo de subir o pool
+        cpus = os.cpu_count() or 1
+        if len(jobs) >= 8 and cpus > 1:
+            with ProcessPoolExecutor(max_workers=cpus) as pool:
+                futures = [
+                    pool.submit(
+                        _render_one, report.company, report.period_label,
+                        employee, filepath
+                    )
+                    for employee, filepath in jobs
+                ]
+                generated = [f.result() for f in futures]
+        else:
+            for employee, filepath in jobs:
+                generated.append(
+                    _render_one(
+                        report.company, report.period_label, employee, filepath
+                    )
+                )
+
         return generated
     
     def export_employee(
@@ -223,22 +330,22 @@ class PDFExporter:
         pdf.cell(line_w, 4, employee.display_name, align='C')
         pdf.set_xy(x1, y + 4)
         pdf._font('', 6)
-        pdf.set_text_color(100, 100, 100)
+        pdf._text_color(100, 100, 100)
         pdf.cell(line_w, 3, 'Assinatura do Funcionário', align='C')
         
         # Assinatura Responsável (direita)
         x2 = 110
         pdf.line(x2, y, x2 + line_w, y)
         pdf._font('', 7)
-        pdf.set_text_color(*BLACK)
+        pdf._text_color(*BLACK)
         pdf.set_xy(x2, y + 1)
         pdf.cell(line_w, 4, pdf.company.name or 'Empresa', align='C')
         pdf.set_xy(x2, y + 4)
         pdf._font('', 6)
-        pdf.set_text_color(100, 100, 100)
+        pdf._text_color(100, 100, 100)
         pdf.cell(line_w, 3, 'Responsável / RH', align='C')
         
-        pdf.set_text_color(*BLACK)
+        pdf._text_color(*BLACK)
     
     def _draw_info_block(self, pdf: PontoPDF, report: MonthlyReport, employee: Employee):
         """Bloco de dados da empresa e funcionário (estilo ControlID)."""
@@ -304,17 +411,17 @@ class PDFExporter:
         y = pdf.get_y()
         
         # Título do quadro
-        pdf.set_fill_color(*RED)
-        pdf.set_text_color(*WHITE)
+        pdf._fill_color(*RED)
+        pdf._text_color(*WHITE)
         pdf._font('B', 7)
         pdf.set_xy(10, y)
         pdf.cell(60, 4, '  HORÁRIO DE TRABALHO', fill=True)
-        pdf.set_text_color(*BLACK)
+        pdf._text_color(*BLACK)
         pdf.ln(4)
         
         # Cabeçalho da mini-tabela
         pdf._font('B', 6)
-        pdf.set_fill_color(*LIGHT_GRAY)
+        pdf._fill_color(*LIGHT_GRAY)
         x0 = 10
         w_day = 12
         w_ent = 12
@@ -329,22 +436,15 @@ class PDFExporter:
         pdf.ln()
         
         # Dias da semana
-        days = ['SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SÁB', 'DOM']
         pdf._font('', 6)
+
+        # Rótulos pré-formatados no __init__ do PontoPDF (os horários de
+        # almoço flexíveis aparecem como dois turnos possíveis)
+        entry, exit_t, flex_sai, flex_ent, sat_entry, sat_exit = (
+            pdf._schedule_labels
+        )
         
-        entry = schedule.entry_time.strftime('%H:%M')
-        exit_t = schedule.exit_time.strftime('%H:%M')
-        
-        # Horários de almoço flexíveis (dois turnos possíveis)
-        brk_s_h = schedule.break_start.hour
-        brk_e_h = schedule.break_end.hour
-        flex_sai = f"{brk_s_h - 2} ou {brk_s_h}h"
-        flex_ent = f"{brk_e_h - 2} ou {brk_e_h}h"
-        
-        sat_entry = schedule.saturday_entry.strftime('%H:%M')
-        sat_exit = schedule.saturday_exit.strftime('%H:%M')
-        
-        for i, day in enumerate(days):
+        for i, day in enumerate(DAY_NAMES):
             pdf.set_x(x0)
             pdf._font('B', 6)
             pdf.cell(w_day, 3.5, day, border=1, align='C')
@@ -375,91 +475,88 @@ class PDFExporter:
     def _draw_table_header(self, pdf: PontoPDF):
         """Cabeçalho da tabela de marcações."""
         pdf._font('B', 6.5)
-        pdf.set_fill_color(*RED)
-        pdf.set_text_color(*WHITE)
-        
-        cols = [
-            ('DIA', 20),
-            ('PREVISTO', 24),
-            ('ENT. 1', 14),
-            ('SAÍ. 1', 14),
-            ('ENT. 2', 14),
-            ('SAÍ. 2', 14),
-            ('TRAB.', 14),
-            ('FALTA/ATRASO', 24),
-            ('EXTRA', 14),
-            ('BANCO', 14),
-            ('OBS.', 34),
-        ]
+        pdf._fill_color(*RED)
+        pdf._text_color(*WHITE)
         
-        for label, w in cols:
+        for label, w in _TABLE_COLS:
             pdf.cell(w, 4.5, label, border=1, align='C', fill=True)
         pdf.ln()
         
-        pdf.set_text_color(*BLACK)
+        pdf._text_color(*BLACK)
     
     def _draw_table_row(self, pdf: PontoPDF, wd: WorkDay):
         """Desenha uma linha da tabela de ponto."""
         pdf._font('', 6.5)
-        
-        weekday = wd.date.weekday()
-        day_names = ['SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SÁB', 'DOM']
-        day_str = f"{wd.date.strftime('%d/%m/%y')} - {day_names[weekday]}"
-        
+
+        # Atributos lidos mais de uma vez ficam em locais — menos
+        # LOAD_ATTR numa rotina chamada uma vez por dia por funcionário
+        is_workday = wd.is_workday
+        is_absent = wd.is_absent
+        is_late = wd.is_late
+        overtime = wd.overtime_hours
+        _fmt = self._format_hours
+
+        d = wd.date
+        day_str = (
+            f"{d.day:02d}/{d.month:02d}/{d.year % 100:02d}"
+            f" - {DAY_NAMES[d.weekday()]}"
+        )
+
         # Background
         fill = False
-        if wd.is_absent and wd.is_workday:
-            pdf.set_fill_color(255, 230, 230)  # Vermelho claro
+        if is_absent and is_workday:
+            pdf._fill_color(255, 230, 230)  # Vermelho claro
             fill = True
-        elif not wd.is_workday and not wd.punches:
-            pdf.set_fill_color(240, 240, 240)  # Cinza claro (folga)
+        elif not is_workday and not wd.punches:
+            pdf._fill_color(240, 240, 240)  # Cinza claro (folga)
             fill = True
         elif wd.is_incomplete:
-            pdf.set_fill_color(255, 245, 210)  # Laranja claro
+            pdf._fill_color(255, 245, 210)  # Laranja claro
             fill = True
-        
+
         ROW_H = 4
-        
+
         # DIA (data + dia da semana)
         pdf.cell(20, ROW_H, day_str, border=1, align='C', fill=fill)
-        
+
         # PREVISTO (horas esperadas)
-        if wd.is_workday and wd.expected_hours > 0:
-            prev_str = self._format_hours(wd.expected_hours)
+        if is_workday and wd.expected_hours > 0:
+            prev_str = _fmt(wd.expected_hours)
         else:
             prev_str = ''
         pdf.cell(24, ROW_H, prev_str, border=1, align='C', fill=fill)
-        
+
         # Marcações (ENT.1, SAÍ.1, ENT.2, SAÍ.2)
         punches = wd.punches
-        
-        if not wd.is_workday and not punches:
+
+        if not is_workday and not punches:
             # Folga
-            pdf.set_text_color(120, 120, 120)
+            pdf._text_color(120, 120, 120)
             pdf.cell(56, ROW_H, 'Folga', border=1, align='C', fill=fill)
-            pdf.set_text_color(*BLACK)
-        elif wd.is_absent and wd.is_workday and not punches:
+            pdf._text_color(*BLACK)
+        elif is_absent and is_workday and not punches:
             # Falta
-            pdf.set_text_color(200, 0, 0)
+            pdf._text_color(200, 0, 0)
             for _ in range(4):
                 pdf.cell(14, ROW_H, 'Falta', border=1, align='C', fill=fill)
-            pdf.set_text_color(*BLACK)
+            pdf._text_color(*BLACK)
         else:
             if len(punches) >= 4:
                 entries = [
-                    punches[0].time.strftime('%H:%M'),
-                    punches[1].time.strftime('%H:%M'),
-                    punches[2].time.strftime('%H:%M'),
-                    punches[3].time.strftime('%H:%M'),
+                    _punch_hhmm(punches[0]),
+                    _punch_hhmm(punches[1]),
+                    _punch_hhmm(punches[2]),
+                    _punch_hhmm(punches[3]),
                 ]
-            elif len(punches) == 2 and punches[0].time.hour >= 11:
-                entries = ['', '', punches[0].time.strftime('%H:%M'), punches[1].time.strftime('%H:%M')]
+            elif len(punches) == 2 and punches[0].minute_of_day >= 660:
+                # Só turno da tarde (primeira marcação a partir das 11h)
+                entries = ['', '', _punch_hhmm(punches[0]), _punch_hhmm(punches[1])]
             elif len(punches) == 2:
-                entries = [punches[0].time.strftime('%H:%M'), '', '', punches[1].time.strftime('%H:%M')]
+                entries = [_punch_hhmm(punches[0]), '', '', _punch_hhmm(punches[1])]
             else:
                 # Fallback para 1, 3, 5+ marcações
                 entries = [
-                    punches[i].time.strftime('%H:%M') if i < len(punches) else ''
+                    _punch_hhmm(punches[i]) if i < len(punches) else ''
                     for i in range(4)
                 ]
             
@@ -467,44 +564,49 @@ class PDFExporter:
                 pdf.cell(14, ROW_H, e, border=1, align='C', fill=fill)
         
         # TRAB. (horas trabalhadas)
-        worked_str = self._format_hours(wd.worked_hours) if wd.worked_hours > 0 else ''
+        worked_str = _fmt(wd.worked_hours) if wd.worked_hours > 0 else ''
         pdf.cell(14, ROW_H, worked_str, border=1, align='C', fill=fill)
-        
-        # FALTA/ATRASO
+
+        # FALTA/ATRASO — cor (e o reset) só quando a célula tem conteúdo;
+        # num dia normal a linha inteira sai sem nenhuma troca de estado
         falta_str = ''
-        if wd.is_absent and wd.is_workday:
-            falta_str = self._format_hours(wd.expected_hours)
-            pdf.set_text_color(200, 0, 0)
-        elif wd.is_late:
+        if is_absent and is_workday:
+            falta_str = _fmt(wd.expected_hours)
+            pdf._text_color(200, 0, 0)
+        elif is_late:
             falta_str = f"{wd.late_minutes:.0f}min"
-            pdf.set_text_color(200, 120, 0)
+            pdf._text_color(200, 120, 0)
         pdf.cell(24, ROW_H, falta_str, border=1, align='C', fill=fill)
-        pdf.set_text_color(*BLACK)
-        
+        if falta_str:
+            pdf._text_color(*BLACK)
+
+        # EXTRA / BANCO compartilham a mesma formatação quando há extra
+        overtime_fmt = f"+{_fmt(overtime)}" if overtime > 0 else ''
+
         # EXTRA
-        extra_str = ''
-        if wd.overtime_hours > 0:
-            extra_str = f"+{self._format_hours(wd.overtime_hours)}"
-            pdf.set_text_color(0, 128, 0)
-        pdf.cell(14, ROW_H, extra_str, border=1, align='C', fill=fill)
-        pdf.set_text_color(*BLACK)
-        
+        if overtime_fmt:
+            pdf._text_color(0, 128, 0)
+        pdf.cell(14, ROW_H, overtime_fmt, border=1, align='C', fill=fill)
+        if overtime_fmt:
+            pdf._text_color(*BLACK)
+
         # BANCO (saldo do dia: extra - déficit)
         banco_str = ''
-        if wd.overtime_hours > 0:
-            banco_str = f"+{self._format_hours(wd.overtime_hours)}"
-            pdf.set_text_color(0, 128, 0)
+        if overtime_fmt:
+            banco_str = overtime_fmt
+            pdf._text_color(0, 128, 0)
         elif wd.deficit_hours > 0:
-            banco_str = f"-{self._format_hours(wd.deficit_hours)}"
-            pdf.set_text_color(200, 0, 0)
+            banco_str = f"-{_fmt(wd.deficit_hours)}"
+            pdf._text_color(200, 0, 0)
         pdf.cell(14, ROW_H, banco_str, border=1, align='C', fill=fill)
-        pdf.set_text_color(*BLACK)
-        
+        if banco_str:
+            pdf._text_color(*BLACK)
+
         # OBS
         obs = wd.observation or ''
-        if wd.is_late and wd.observation:
+        if is_late and obs:
             obs = f"Atraso {wd.late_minutes:.0f}min | {obs}"
-        elif wd.is_late:
+        elif is_late:
             obs = f"Atraso {wd.late_minutes:.0f}min"
         pdf._font('', 5.5)
         pdf.cell(34, ROW_H, obs[:30] if obs else '', border=1, align='L', fill=fill)
@@ -516,52 +618,65 @@ class PDFExporter:
         """Resumo do período."""
         # Título
         pdf._font('B', 8)
-        pdf.set_fill_color(*RED)
-        pdf.set_text_color(*WHITE)
+        pdf._fill_color(*RED)
+        pdf._text_color(*WHITE)
         pdf.cell(0, 5, '  RESUMO DO PERÍODO', ln=True, fill=True)
-        pdf.set_text_color(*BLACK)
+        pdf._text_color(*BLACK)
         
         pdf._font('', 7)
-        pdf.set_fill_color(*LIGHT_GRAY)
-        
-        total_expected = sum(wd.expected_hours for wd in employee.workdays)
-        incomplete = sum(1 for wd in employee.workdays if wd.is_incomplete)
-        
+        pdf._fill_color(*LIGHT_GRAY)
+        
+        # Agregados vêm da varredura única memoizada em Employee.totals —
+        # uma leitura só, nada de repassar os workdays aqui
+        totals = employee.totals
+        overtime = totals.overtime_hours
+        deficit = totals.deficit_hours
+        incomplete = totals.incomplete_days
+        _fmt = self._format_hours
+
         # Saldo banco de horas
-        bank_balance = employee.total_overtime_hours - employee.total_deficit_hours
-        
+        bank_balance = overtime - deficit
+
+        green = (0, 128, 0)
+        red = (200, 0, 0)
+
+        # A cor do valor sai junto com o dado — nada de reinterpretar o
+        # rótulo com buscas de substring na hora de desenhar
         rows = [
-            ('Total Horas Trabalhadas', self._format_hours(employee.total_worked_hours)),
-            ('Total Horas Previstas', self._format_hours(total_expected)),
-            ('Horas Extras', f"+{self._format_hours(employee.total_overtime_hours)}" if employee.total_overtime_hours > 0 else '0h00'),
-            ('Horas em Déficit', f"-{self._format_hours(employee.total_deficit_hours)}" if employee.total_deficit_hours > 0 else '0h00'),
-            ('Banco de Horas (Saldo)', f"{'+' if bank_balance >= 0 else '-'}{self._format_hours(abs(bank_balance))}"),
-            ('Dias com Atraso', f"{employee.total_late_days} dias ({employee.total_late_minutes:.0f} min total)"),
-            ('Faltas', f"{employee.total_absent_days} dias"),
-            ('Marcações Incompletas', f"{incomplete} dias"),
+            ('Total Horas Trabalhadas', _fmt(totals.worked_hours), None),
+            ('Total Horas Previstas', _fmt(totals.expected_hours), None),
+            ('Horas Extras',
+             f"+{_fmt(overtime)}" if overtime > 0 else '0h00',
+             green if overtime > 0 else None),
+            ('Horas em Déficit',
+             f"-{_fmt(deficit)}" if deficit > 0 else '0h00',
+             red if deficit > 0 else None),
+            ('Banco de Horas (Saldo)',
+             f"{'+' if bank_balance >= 0 else '-'}{_fmt(abs(bank_balance))}",
+             green if bank_balance >= 0 else red),
+            ('Dias com Atraso',
+             f"{totals.late_days} dias ({totals.late_minutes:.0f} min total)",
+             None),
+            ('Faltas', f"{totals.absent_days} dias",
+             red if totals.absent_days > 0 else None),
+            ('Marcações Incompletas', f"{incomplete} dias",
+             (210, 140, 0) if incomplete > 0 else None),
         ]
-        
+
         H = 4.5
-        for i, (label, value) in enumerate(rows):
+        for i, (label, value, color) in enumerate(rows):
             f = i % 2 == 0
             pdf.cell(95, H, f"  {label}", border=1, fill=f)
-            
-            # Colorir valores
-            if 'Extra' in label and employee.total_overtime_hours > 0:
-                pdf.set_text_color(0, 128, 0)
-            elif 'Déficit' in label and employee.total_deficit_hours > 0:
-                pdf.set_text_color(200, 0, 0)
-            elif 'Banco' in label:
-                pdf.set_text_color(0, 128, 0) if bank_balance >= 0 else pdf.set_text_color(200, 0, 0)
-            elif 'Falta' in label and employee.total_absent_days > 0:
-                pdf.set_text_color(200, 0, 0)
-            elif 'Incompletas' in label and incomplete > 0:
-                pdf.set_text_color(210, 140, 0)
-            
+            if color:
+                pdf._text_color(*color)
             pdf.cell(95, H, f"  {value}", border=1, fill=f, ln=True)
-            pdf.set_text_color(*BLACK)
+            if color:
+                pdf._text_color(*BLACK)
     
+    # Os mesmos valores (8.0, 8.5, 4.0…) se repetem em quase toda linha e
+    # no resumo — o cache troca aritmética + f-string por um lookup
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _format_hours(hours: float) -> str:
         """Formata horas decimal em HhMM (ex: 8.5 → 8h30)."""
         h = int(abs(hours))
@@ -571,6 +686,18 @@ class PDFExporter:
     @staticmethod
     def _safe_filename(name: str) -> str:
         """Remove caracteres inválidos para nome de arquivo."""
-        import re
-        safe = re.sub(r'[^\w\s\-]', '', name)
-        return safe.strip().replace(' ', '_')
+        return _SAFE_RE.sub('', name).strip().replace(' ', '_')
+
+
+def _render_one(
+    company: Company, period_label: str, employee: Employee, filepath: str
+) -> str:
+    """Renderiza e grava o PDF de um colaborador (worker de processo)."""
+    exporter = PDFExporter()
+    schedule = company.default_schedule
+    pdf = PontoPDF(company, period_label, schedule)
+    pdf.alias_nb_pages()
+    report = MonthlyReport(company=company, employees=[employee])
+    exporter._add_employee_pages(pdf, report, employee)
+    pdf.output(filepath)
+    return filepath
@@ -9,12 +9,21 @@ import os
 import sys
 import subprocess
 import tempfile
+import time
 import urllib.request
 import urllib.error
 import ssl
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Tuple, Callable
 
+# orjson (Rust) decodifica payloads grandes bem mais rápido — opcional,
+# com fallback transparente para o json da stdlib
+try:
+    import orjson as _json_loads_mod
+except ImportError:
+    _json_loads_mod = json
+
 
 # =====================================================
 # VERSÃO ATUAL DO APLICATIVO
@@ -42,8 +51,13 @@ def get_current_version() -> str:
     return APP_VERSION
 
 
+@lru_cache(maxsize=64)
 def _parse_version(version: str) -> tuple:
-    """Converte '1.2.3' em (1, 2, 3) para comparação."""
+    """Converte '1.2.3' em (1, 2, 3) para comparação.
+
+    Memoizado — a verificação periódica reparseia sempre as mesmas
+    duas ou três strings de versão.
+    """
     try:
         parts = version.strip().lstrip('v').split('.')
         return tuple(int(p) for p in parts)
@@ -68,8 +82,10 @@ def check_for_update() -> Tuple[bool, Optional[UpdateInfo], str]:
         )
         
         # GitHub usa HTTPS válido, não precisa ignorar cert
+        # loads direto dos bytes — ambos os decoders aceitam, sem o
+        # .decode('utf-8') intermediário
         with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode('utf-8'))
+            data = _json_loads_mod.loads(resp.read())
         
         remote_version = data.get('tag_name', '').lstrip('v')
         changelog = data.get('body', 'Sem detalhes.')
@@ -137,8 +153,9 @@ def download_update(
         with urllib.request.urlopen(req, timeout=120) as resp:
             total_size = int(resp.headers.get('Content-Length', 0))
             downloaded = 0
-            chunk_size = 65536  # 64KB
-            
+            chunk_size = 1024 * 1024  # 1 MB — menos voltas no loop Python
+            last_report = 0.0
+
             with open(temp_path, 'wb') as f:
                 while True:
                     chunk = resp.read(chunk_size)
@@ -146,9 +163,15 @@ def download_update(
                         break
                     f.write(chunk)
                     downloaded += len(chunk)
-                    
+
+                    # Progresso no máximo a cada 250 ms (e no final) — o
+                    # callback redesenha a UI e não precisa de 800 updates
                     if progress_callback and total_size > 0:
-                        progress_callback(downloaded, total_size)
+                        now = time.monotonic()
+                        if (now - last_report >= 0.25
+                                or downloaded >= total_size):
+                            last_report = now
+                            progress_callback(downloaded, total_size)
         
         # Verifica se o download foi completo
         actual_size = os.path.getsize(temp_path)
@@ -3,6 +3,8 @@ AFD Parser — Controle de Ponto
 Programa para importar arquivos AFD de relógios ControlID,
 calcular horas extras/faltas e exportar relatórios em PDF.
 """
+import multiprocessing
+
 from ui.main_window import MainWindow
 
 
@@ -12,4 +14,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # Obrigatório no exe PyInstaller: sem isso, cada worker dos pools de
+    # processos (export/parse paralelos) re-executa o aplicativo inteiro
+    # no spawn do Windows em vez de virar worker
+    multiprocessing.freeze_support()
     main()
@@ -3,17 +3,21 @@ Janela principal do AFD Parser.
 Interface moderna com CustomTkinter para importar AFD,
 selecionar período, visualizar colaboradores e exportar PDF.
 """
+import atexit
 import os
 import sys
 import json
+import time
 import threading
+from functools import lru_cache
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from typing import Optional, Dict, List
 
 from app.parser import AFDParser
 from app.calculator import WorkCalculator
-from app.pdf_export import PDFExporter
+# PDFExporter é importado sob demanda nos handlers de exportação —
+# ele puxa fpdf/Pillow, que pesam no tempo de abertura da janela
 from app.models import (
     Employee, Company, ScheduleConfig, ScheduleType, MonthlyReport
 )
@@ -36,6 +40,57 @@ SCHEDULE_LABELS = {
 
 SCHEDULE_FROM_LABEL = {v: k for k, v in SCHEDULE_LABELS.items()}
 
+# Parâmetros aplicados ao trocar a escala no dropdown principal.
+# Campos ausentes não são tocados — 12x36 não altera os dias de trabalho
+# e CUSTOM (fora da tabela) não mexe em nada.
+SCHEDULE_PRESETS = {
+    ScheduleType.STANDARD: {"days": (0, 1, 2, 3, 4, 5), "daily": 8.0, "sat": 4.0},
+    ScheduleType.SCALE_5X2: {"days": (0, 1, 2, 3, 4), "daily": 8.8},
+    ScheduleType.SCALE_6X1: {"days": (0, 1, 2, 3, 4, 5), "daily": 8.0, "sat": 4.0},
+    ScheduleType.SCALE_12X36: {"daily": 12.0},
+    ScheduleType.PARTIAL_30: {"days": (0, 1, 2, 3, 4), "daily": 6.0, "weekly": 30.0},
+    ScheduleType.PARTIAL_26: {"days": (0, 1, 2, 3, 4), "daily": 5.2, "weekly": 26.0},
+}
+
+# Nomes de meses (índice 1-12) e o reverso para o dropdown de período
+MONTH_NAMES = (
+    '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+)
+MONTH_INDEX = {name: i for i, name in enumerate(MONTH_NAMES) if name}
+
+
+_DAY_NAMES = ("Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom")
+
+
+@lru_cache(maxsize=8)
+def _format_days(days: tuple) -> str:
+    """Formata a tupla de dias de trabalho ('Seg, Ter, ...'), memoizado."""
+    return ", ".join(_DAY_NAMES[d] for d in days if d < 7)
+
+
+# Fontes compartilhadas da janela de configurações — evita realocar a
+# mesma tupla em cada um dos ~20 labels criados por abertura
+_FONT_SECTION = ("Segoe UI", 14, "bold")
+_FONT_LABEL = ("Segoe UI", 11)
+_FONT_SMALL = ("Segoe UI", 10)
+
+
+@lru_cache(maxsize=16)
+def _resolve_schedule(stype: ScheduleType) -> tuple:
+    """Resolve (daily, sat, days, label) da escala, memoizado.
+
+    Os callbacks da janela de configurações encadeavam dois dict.get por
+    evento de dropdown; aqui a cadeia roda uma vez por tipo de escala.
+    """
+    d = SettingsWindow.SCHEDULE_DEFAULTS.get(stype, {})
+    return (
+        d.get("daily", 8.0),
+        d.get("sat", 0),
+        tuple(d.get("days", (0, 1, 2, 3, 4, 5))),
+        d.get("label", ""),
+    )
+
 # Config persistente no AppData do Windows (sobrevive a atualizações do programa)
 _OLD_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'config.json')
 
@@ -58,6 +113,76 @@ def _get_config_path() -> str:
 CONFIG_FILE = _get_config_path()
 
 
+class _ConfigCache:
+    """Cache em memória do config.json para as seções do ClockDialog.
+
+    Abrir o diálogo e cada save faziam um round-trip completo de disco
+    (exists + json.load + json.dump). O cache mantém o dict em memória,
+    revalida por mtime (outros escritores, como o _save_config da janela
+    principal, continuam sendo vistos) e coalesce rajadas de saves num
+    único flush atômico 0,5 s depois, fora da thread do Tk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[dict] = None
+        self._mtime: int = -1
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        # O timer é daemon: fechar o app dentro da janela de 0,5 s
+        # perderia o último save sem este flush de saída
+        atexit.register(self._flush)
+
+    def get(self) -> dict:
+        """Retorna o config atual, relendo do disco só se o mtime mudou."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._data = {}
+            self._mtime = -1
+            return self._data
+
+        if self._data is None or mtime != self._mtime:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except Exception:
+                self._data = {}
+            self._mtime = mtime
+        return self._data
+
+    def update(self, section: str, values: dict):
+        """Mescla a seção no cache e agenda um flush debounced."""
+        with self._lock:
+            self.get()[section] = values
+            self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(0.5, self._flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush(self):
+        with self._lock:
+            # Sem _dirty o flush do atexit reescreveria o arquivo com
+            # dados possivelmente mais antigos que os de outro escritor
+            if not self._dirty or self._data is None:
+                return
+            try:
+                tmp = self.path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self._data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                self._mtime = os.stat(self.path).st_mtime_ns
+                self._dirty = False
+            except Exception:
+                pass
+
+
+_CONFIG_CACHE = _ConfigCache(CONFIG_FILE)
+
+
 class MainWindow(ctk.CTk):
     """Janela principal do aplicativo."""
     
@@ -97,12 +222,26 @@ class MainWindow(ctk.CTk):
         # State
         self.parser: Optional[AFDParser] = None
         self.report: Optional[MonthlyReport] = None
+        # Exports leem self.report de uma thread de trabalho
+        self._report_lock = threading.Lock()
+        # get_summary() varre o AFD inteiro — computado uma vez por parse
+        self._summary: Optional[dict] = None
+        # Reabrir o mesmo AFD não reparseia: (path, mtime, size) → resultado
+        self._parse_cache: Dict[tuple, tuple] = {}
+        # Id do after() pendente do debounce de _process
+        self._process_pending: Optional[str] = None
+        # PDFExporter compartilhado — criado no primeiro export
+        self._exporter = None
         self.company = Company()
         self.schedule = ScheduleConfig()
         self.afd_filepath: str = ""
         self.selected_month: int = 0
         self.selected_year: int = 0
-        
+        # Último JSON de config gravado — saves sem mudança viram no-op
+        self._last_config_payload: Optional[str] = None
+        # Epoch da última verificação de atualização (persistido no config)
+        self._last_update_check: float = 0.0
+
         # Carrega config salva
         self._load_config()
         
@@ -113,7 +252,21 @@ class MainWindow(ctk.CTk):
         self._build_ui()
         
         # Verifica atualização em background (adiado 2s para evitar conflito com CTk)
-        self.after(2000, lambda: self._check_update_background())
+        self.after(2000, self._maybe_check_update)
+
+    def _maybe_check_update(self):
+        """Dispara a verificação de atualização no máximo a cada 6 horas.
+
+        O timestamp persiste no config.json — quem abre o app várias
+        vezes ao dia não gera uma requisição de rede por abertura. O
+        throttle fica antes de qualquer thread/socket ser criado.
+        """
+        now = time.time()
+        if now - self._last_update_check < 6 * 3600:
+            return
+        self._last_update_check = now
+        self._save_config()
+        self._check_update_background()
     
     def _build_ui(self):
         """Constrói toda a interface."""
@@ -326,7 +479,12 @@ class MainWindow(ctk.CTk):
             self.right_panel, fg_color="transparent"
         )
         self.employees_scroll.pack(fill='both', expand=True, padx=10, pady=5)
-        
+
+        # Pool de cards reutilizáveis — o frame acabou de ser (re)criado,
+        # então qualquer card antigo morreu junto com o frame anterior
+        self._emp_cards: Dict[str, dict] = {}
+        self._card_pool: List[dict] = []
+
         self.lbl_no_data = ctk.CTkLabel(
             self.employees_scroll,
             text="Importe um arquivo AFD e processe\npara ver os colaboradores aqui.",
@@ -348,45 +506,111 @@ class MainWindow(ctk.CTk):
         
         if not filepath:
             return
-        
+
         self.afd_filepath = filepath
         self.lbl_filename.configure(text=os.path.basename(filepath))
+        self._start_parse(filepath)
+
+    def _start_parse(self, filepath: str):
+        """Dispara o parse do AFD em thread separada.
+
+        O parse de arquivos grandes leva segundos — rodar direto no loop
+        do Tk congela a janela inteira. A thread faz o trabalho pesado e
+        devolve o resultado via self.after() para a thread principal.
+
+        Reabrir um arquivo já parseado (mesmo caminho, mtime e tamanho)
+        reaproveita o resultado do cache sem tocar no disco de novo.
+        """
+        self._summary = None  # invalida o resumo do parse anterior
+
+        key = self._file_key(filepath)
+        hit = self._parse_cache.get(key) if key is not None else None
+        if hit is not None:
+            self.status_label.configure(text="Arquivo já lido — reaproveitando.")
+            self._apply_parse_result(*hit)
+            return
+
         self.status_label.configure(text="Lendo arquivo AFD...")
-        self.update()
-        
-        # Parse
-        self.parser = AFDParser()
-        employees, company = self.parser.parse_file(filepath)
-        
+        self.btn_import.configure(state='disabled')
+        self.btn_from_clock.configure(state='disabled')
+        self.update_idletasks()
+
+        threading.Thread(
+            target=self._parse_worker, args=(filepath, key), daemon=True
+        ).start()
+
+    @staticmethod
+    def _file_key(filepath: str) -> Optional[tuple]:
+        """Chave de cache do arquivo: caminho + mtime + tamanho."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+    def _parse_worker(self, filepath: str, key: Optional[tuple]):
+        """Roda na thread de trabalho: parseia e posta o resultado no Tk."""
+        try:
+            parser = AFDParser()
+            parser.parse_file(filepath)
+            summary = parser.get_summary()
+        except Exception as e:
+            self.after(0, self._parse_failed, str(e))
+            return
+
+        if key is not None:
+            self._parse_cache[key] = (parser, summary)
+            # Cap pequeno: cada entrada segura todos os punches do AFD
+            while len(self._parse_cache) > 3:
+                self._parse_cache.pop(next(iter(self._parse_cache)))
+
+        self.after(0, self._apply_parse_result, parser, summary)
+
+    def _parse_failed(self, error: str):
+        """Reabilita os botões e mostra o erro (thread principal)."""
+        self.btn_import.configure(state='normal')
+        self.btn_from_clock.configure(state='normal')
+        self.status_label.configure(text=f"❌ Erro ao ler AFD: {error}")
+
+    def _apply_parse_result(self, parser: AFDParser, summary: dict):
+        """Aplica o resultado do parse na UI (thread principal, via after)."""
+        self.parser = parser
+        self._summary = summary
+        self.btn_import.configure(state='normal')
+        self.btn_from_clock.configure(state='normal')
+
         # Atualiza dados da empresa (mantém config manual se houver)
+        company = parser.company
         if company.name and not self.company.name:
             self.company.name = company.name
         if company.cnpj and not self.company.cnpj:
             self.company.cnpj = company.cnpj
-        
-        # Atualiza info
-        summary = self.parser.get_summary()
-        self.lbl_company.configure(
-            text=f"🏢 {summary['company_name'] or 'Empresa não identificada'}\n"
-                 f"📋 CNPJ: {summary['company_cnpj'] or 'N/A'}"
+
+        # Monta todos os textos primeiro; os configure() saem em rajada
+        # única no final — sem update() intermediário forçando passes de
+        # geometria entre um label e outro
+        company_text = (
+            f"🏢 {summary['company_name'] or 'Empresa não identificada'}\n"
+            f"📋 CNPJ: {summary['company_cnpj'] or 'N/A'}"
         )
-        self.lbl_stats.configure(
-            text=f"📊 {summary['total_punches']} marcações | "
-                 f"{summary['total_employees']} colaboradores | "
-                 f"Formato: {summary['format'].upper()}"
+        stats_text = (
+            f"📊 {summary['total_punches']} marcações | "
+            f"{summary['total_employees']} colaboradores | "
+            f"Formato: {summary['format'].upper()}"
         )
-        
-        # Atualiza dropdown de meses
+
         months = summary['months_available']
-        month_labels = []
-        month_names = [
-            '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-        ]
-        
-        for m, y in months:
-            month_labels.append(f"{month_names[m]} / {y}")
-        
+        month_labels = [f"{MONTH_NAMES[m]} / {y}" for m, y in months]
+
+        if summary['errors'] > 0:
+            status_text = f"Arquivo lido com {summary['errors']} avisos. Processando..."
+        else:
+            status_text = "Arquivo lido com sucesso! Processando..."
+
+        self.lbl_company.configure(text=company_text)
+        self.lbl_stats.configure(text=stats_text)
+        self.status_label.configure(text=status_text)
+
         if month_labels:
             self.month_dropdown.configure(values=month_labels)
             self.month_var.set(month_labels[-1])  # Último mês disponível
@@ -395,33 +619,19 @@ class MainWindow(ctk.CTk):
             self.selected_month = last_month
             self.selected_year = last_year
             self.btn_process.configure(state='normal')
-        
-        if summary['errors'] > 0:
-            self.status_label.configure(
-                text=f"Arquivo lido com {summary['errors']} avisos. Processando..."
-            )
-        else:
-            self.status_label.configure(
-                text=f"Arquivo lido com sucesso! Processando..."
-            )
-        self.update()
-        
-        # Auto-processa o ultimo mes disponivel
+
+        # Auto-processa o ultimo mes disponivel (debounced — coalesce com
+        # um eventual _on_month_selected disparado pelo set do dropdown)
         if self.selected_month and self.parser:
-            self._process()
+            self._schedule_process()
     
     def _on_month_selected(self, value: str):
         """Callback quando o mês é selecionado."""
-        month_names = [
-            '', 'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-        ]
-        
         try:
             parts = value.split(' / ')
             month_name = parts[0].strip()
             year = int(parts[1].strip())
-            month = month_names.index(month_name)
+            month = MONTH_INDEX[month_name]
             self.selected_month = month
             self.selected_year = year
             
@@ -436,38 +646,44 @@ class MainWindow(ctk.CTk):
             
             # Auto-processa ao trocar de mês
             if self.parser:
-                self._process()
-        except (ValueError, IndexError):
+                self._schedule_process()
+        except (ValueError, IndexError, KeyError):
             pass
+
+    def _schedule_process(self):
+        """Agenda um _process com debounce de 200 ms.
+
+        Quem navega rápido pelo dropdown de meses dispararia um
+        reprocessamento completo por clique — só o último evento da
+        rajada executa de fato.
+        """
+        if self._process_pending is not None:
+            self.after_cancel(self._process_pending)
+        self._process_pending = self.after(200, self._run_scheduled_process)
+
+    def _run_scheduled_process(self):
+        self._process_pending = None
+        self._process()
     
     def _on_schedule_changed(self, value: str):
         """Callback quando a escala é alterada."""
         stype = SCHEDULE_FROM_LABEL.get(value, ScheduleType.SCALE_6X1)
         self.schedule.schedule_type = stype
-        
-        # Ajusta parâmetros conforme escala
-        if stype == ScheduleType.STANDARD:
-            self.schedule.workdays = [0, 1, 2, 3, 4, 5]
-            self.schedule.daily_hours = 8.0
-            self.schedule.saturday_hours = 4.0
-        elif stype == ScheduleType.SCALE_5X2:
-            self.schedule.workdays = [0, 1, 2, 3, 4]
-            self.schedule.daily_hours = 8.8
-        elif stype == ScheduleType.SCALE_6X1:
-            self.schedule.workdays = [0, 1, 2, 3, 4, 5]
-            self.schedule.daily_hours = 8.0
-            self.schedule.saturday_hours = 4.0
-        elif stype == ScheduleType.SCALE_12X36:
-            self.schedule.daily_hours = 12.0
-        elif stype == ScheduleType.PARTIAL_30:
-            self.schedule.workdays = [0, 1, 2, 3, 4]
-            self.schedule.daily_hours = 6.0
-            self.schedule.weekly_hours = 30.0
-        elif stype == ScheduleType.PARTIAL_26:
-            self.schedule.workdays = [0, 1, 2, 3, 4]
-            self.schedule.daily_hours = 5.2
-            self.schedule.weekly_hours = 26.0
-        
+
+        # Ajusta parâmetros conforme escala — lookup na tabela de presets
+        preset = SCHEDULE_PRESETS.get(stype)
+        if preset:
+            days = preset.get("days")
+            if days is not None:
+                self.schedule.workdays = list(days)
+            self.schedule.daily_hours = preset["daily"]
+            sat = preset.get("sat")
+            if sat is not None:
+                self.schedule.saturday_hours = sat
+            weekly = preset.get("weekly")
+            if weekly is not None:
+                self.schedule.weekly_hours = weekly
+
         self._save_config()
     
     def _parse_date_entry(self, text: str):
@@ -484,119 +700,207 @@ class MainWindow(ctk.CTk):
         if not self.parser or not self.selected_month:
             messagebox.showwarning("Aviso", "Selecione um arquivo AFD e mês primeiro.")
             return
-        
+
         self.status_label.configure(text="⏳ Processando marcações...")
-        self.update()
-        
-        # Lê período customizado
+        self.btn_process.configure(state='disabled')
+        self.update_idletasks()
+
+        # Widgets são lidos aqui, ainda na thread principal — Tk não é
+        # thread-safe; a thread de trabalho só recebe valores prontos.
         start_date = self._parse_date_entry(self.entry_start_date.get())
         end_date = self._parse_date_entry(self.entry_end_date.get())
-        
+
         # Sincroniza escala ativa com a empresa (usado pelo PDF)
         self.company.default_schedule = self.schedule
-        
-        calculator = WorkCalculator(default_schedule=self.schedule)
-        self.report = calculator.generate_report(
-            employees=self.parser.employees,
-            punches=self.parser.punches,
-            company=self.company,
-            month=self.selected_month,
-            year=self.selected_year,
-            start_date=start_date,
-            end_date=end_date
-        )
-        
+        parser = self.parser
+
+        def _job():
+            try:
+                calculator = WorkCalculator(default_schedule=self.schedule)
+                report = calculator.generate_report(
+                    employees=parser.employees,
+                    punches=parser.punches,
+                    company=self.company,
+                    month=self.selected_month,
+                    year=self.selected_year,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+            except Exception as e:
+                self.after(0, self._process_failed, str(e))
+                return
+            self.after(0, self._finish_process, report)
+
+        threading.Thread(target=_job, daemon=True).start()
+
+    def _process_failed(self, error: str):
+        """Mostra falha do processamento (thread principal)."""
+        self.btn_process.configure(state='normal')
+        self.status_label.configure(text=f"❌ Erro ao processar: {error}")
+
+    def _finish_process(self, report: MonthlyReport):
+        """Aplica o relatório pronto na UI (thread principal, via after)."""
+        with self._report_lock:
+            self.report = report
+        self.btn_process.configure(state='normal')
+
         # Atualiza lista de colaboradores
         self._update_employee_list()
-        
+
         # Habilita exportação
         self.btn_export_individual.configure(state='normal')
         self.btn_export_consolidated.configure(state='normal')
-        
-        total_extra = sum(e.total_overtime_hours for e in self.report.employees)
-        total_faltas = sum(e.total_absent_days for e in self.report.employees)
-        
-        period_str = self.report.period_label
+
+        # Uma passada só: cada emp.totals já agrega os workdays em uma
+        # varredura memoizada, então aqui só somamos os agregados prontos
+        total_extra = 0.0
+        total_faltas = 0
+        for emp in report.employees:
+            totals = emp.totals
+            total_extra += totals.overtime_hours
+            total_faltas += totals.absent_days
+
         self.status_label.configure(
-            text=f"✅ Processado! {len(self.report.employees)} colaboradores | "
+            text=f"✅ Processado! {len(report.employees)} colaboradores | "
                  f"Extras: {total_extra:.1f}h | Faltas: {total_faltas} dias"
         )
     
+    def _make_employee_card(self) -> dict:
+        """Cria um card vazio de colaborador, reutilizável entre renders.
+
+        Criar ~5 widgets Tk por colaborador a cada _process domina o custo
+        da atualização em empresas grandes. O card é criado uma vez e os
+        renders seguintes só fazem configure() de texto/cor.
+        """
+        card = ctk.CTkFrame(self.employees_scroll, height=90, cursor="hand2")
+        card.pack_propagate(False)
+
+        # Nome e PIS
+        info_frame = ctk.CTkFrame(card, fg_color="transparent")
+        info_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        name_lbl = ctk.CTkLabel(
+            info_frame, text="",
+            font=("Segoe UI", 13, "bold"), anchor='w'
+        )
+        name_lbl.pack(fill='x')
+
+        pis_lbl = ctk.CTkLabel(
+            info_frame, text="",
+            font=("Segoe UI", 10), text_color="#aaa", anchor='w'
+        )
+        pis_lbl.pack(fill='x')
+
+        # Stats
+        stats_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        stats_frame.pack(fill='x')
+
+        stats_lbl = ctk.CTkLabel(
+            stats_frame, text="",
+            font=("Segoe UI", 10), anchor='w'
+        )
+        stats_lbl.pack(fill='x')
+
+        # Hint de clique
+        hint_lbl = ctk.CTkLabel(
+            info_frame, text="🔍 Clique para ver detalhes",
+            font=("Segoe UI", 9), text_color="#666", anchor='e'
+        )
+        hint_lbl.pack(fill='x')
+
+        holder = {
+            'card': card, 'name': name_lbl, 'pis': pis_lbl,
+            'stats': stats_lbl, 'emp': None,
+        }
+
+        # Um único handler por card — o colaborador atual vem do holder,
+        # então religar o clique a cada render vira uma escrita no dict
+        def _on_click(e, holder=holder):
+            if holder['emp'] is not None:
+                self._show_employee_preview(holder['emp'])
+
+        for w in (card, info_frame, name_lbl, pis_lbl,
+                  stats_frame, stats_lbl, hint_lbl):
+            w.bind("<Button-1>", _on_click)
+
+        return holder
+
+    def _release_card(self, pis: str):
+        """Desempacota o card do PIS e o devolve ao pool livre."""
+        holder = self._emp_cards.pop(pis)
+        holder['card'].pack_forget()
+        holder['emp'] = None
+        self._card_pool.append(holder)
+
     def _update_employee_list(self):
         """Atualiza a lista visual de colaboradores no painel direito."""
-        # Limpa lista atual
-        for widget in self.employees_scroll.winfo_children():
-            widget.destroy()
-        
-        if not self.report or not self.report.employees:
-            ctk.CTkLabel(
+        # Desmapeia o frame durante o rebuild: packs em frame invisível
+        # não disparam recálculo de geometria — o Tk faz um único passe
+        # no re-pack final em vez de um por card
+        self.employees_scroll.pack_forget()
+        try:
+            self._render_employee_list()
+        finally:
+            self.employees_scroll.pack(fill='both', expand=True, padx=10, pady=5)
+
+    def _render_employee_list(self):
+        """Preenche os cards dentro do frame (desmapeado) de colaboradores."""
+        if self.lbl_no_data is not None:
+            self.lbl_no_data.destroy()
+            self.lbl_no_data = None
+
+        employees = self.report.employees if self.report else []
+        if not employees:
+            for pis in list(self._emp_cards):
+                self._release_card(pis)
+            self.lbl_no_data = ctk.CTkLabel(
                 self.employees_scroll,
                 text="Nenhum colaborador encontrado.",
                 font=("Segoe UI", 13), text_color="#666"
-            ).pack(expand=True, pady=50)
+            )
+            self.lbl_no_data.pack(expand=True, pady=50)
             return
-        
-        for emp in self.report.employees:
-            card = ctk.CTkFrame(self.employees_scroll, height=90, cursor="hand2")
-            card.pack(fill='x', pady=3)
-            card.pack_propagate(False)
-            
-            # Nome e PIS
-            info_frame = ctk.CTkFrame(card, fg_color="transparent")
-            info_frame.pack(fill='both', expand=True, padx=10, pady=5)
-            
-            ctk.CTkLabel(
-                info_frame, text=f"👤 {emp.display_name}",
-                font=("Segoe UI", 13, "bold"), anchor='w'
-            ).pack(fill='x')
-            
-            ctk.CTkLabel(
-                info_frame, text=f"PIS: {emp.pis}",
-                font=("Segoe UI", 10), text_color="#aaa", anchor='w'
-            ).pack(fill='x')
-            
-            # Stats
-            stats_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-            stats_frame.pack(fill='x')
-            
-            total_expected = sum(wd.expected_hours for wd in emp.workdays)
-            
+
+        # Devolve ao pool os cards de quem saiu do relatório
+        current = {emp.pis for emp in employees}
+        for pis in [p for p in self._emp_cards if p not in current]:
+            self._release_card(pis)
+
+        for emp in employees:
+            holder = self._emp_cards.get(emp.pis)
+            if holder is None:
+                holder = (
+                    self._card_pool.pop() if self._card_pool
+                    else self._make_employee_card()
+                )
+                self._emp_cards[emp.pis] = holder
+            holder['emp'] = emp
+
+            # Agregados em uma leitura só do cache de totais
+            totals = emp.totals
+
             stats_text = (
-                f"Trabalhadas: {emp.total_worked_hours:.1f}h  |  "
-                f"Previstas: {total_expected:.1f}h  |  "
-                f"Extras: +{emp.total_overtime_hours:.1f}h  |  "
-                f"Faltas: {emp.total_absent_days}"
+                f"Trabalhadas: {totals.worked_hours:.1f}h  |  "
+                f"Previstas: {totals.expected_hours:.1f}h  |  "
+                f"Extras: +{totals.overtime_hours:.1f}h  |  "
+                f"Faltas: {totals.absent_days}"
             )
-            
+
             # Cor baseada no status
-            if emp.total_absent_days > 3:
+            if totals.absent_days > 3:
                 stats_color = "#e63946"
-            elif emp.total_overtime_hours > 10:
+            elif totals.overtime_hours > 10:
                 stats_color = "#f4a261"
             else:
                 stats_color = "#2a9d8f"
-            
-            ctk.CTkLabel(
-                stats_frame, text=stats_text,
-                font=("Segoe UI", 10), text_color=stats_color, anchor='w'
-            ).pack(fill='x')
-            
-            # Hint de clique
-            ctk.CTkLabel(
-                info_frame, text="🔍 Clique para ver detalhes",
-                font=("Segoe UI", 9), text_color="#666", anchor='e'
-            ).pack(fill='x')
-            
-            # Click handler - vincula em todos os filhos do card
-            def _on_click(e, employee=emp):
-                self._show_employee_preview(employee)
-            card.bind("<Button-1>", _on_click)
-            for child in card.winfo_children():
-                child.bind("<Button-1>", _on_click)
-                for grandchild in child.winfo_children():
-                    grandchild.bind("<Button-1>", _on_click)
-                    for ggchild in grandchild.winfo_children():
-                        ggchild.bind("<Button-1>", _on_click)
+
+            holder['name'].configure(text=f"👤 {emp.display_name}")
+            holder['pis'].configure(text=f"PIS: {emp.pis}")
+            holder['stats'].configure(text=stats_text, text_color=stats_color)
+
+            # forget + pack reempacota na ordem do relatório
+            holder['card'].pack_forget()
+            holder['card'].pack(fill='x', pady=3)
     
     def _show_employee_preview(self, emp):
         """Mostra preview detalhado — estilo planilha RHiD editável."""
@@ -651,8 +955,9 @@ class MainWindow(ctk.CTk):
         ).pack(side='left', padx=5, pady=4)
         
         # === Info rápida ===
-        total_expected = sum(wd.expected_hours for wd in emp.workdays)
-        bank = emp.total_overtime_hours - emp.total_deficit_hours
+        totals = emp.totals
+        total_expected = totals.expected_hours
+        bank = totals.overtime_hours - totals.deficit_hours
         
         info_bar = ctk.CTkFrame(self.right_panel, fg_color=("#2d2d44", "#2d2d44"), height=35)
         info_bar.pack(fill='x')
@@ -662,11 +967,11 @@ class MainWindow(ctk.CTk):
         bank_color = "#2a9d8f" if bank >= 0 else "#e63946"
         
         info_items = [
-            (f"Trab: {emp.total_worked_hours:.1f}h", "#ccc"),
+            (f"Trab: {totals.worked_hours:.1f}h", "#ccc"),
             (f"Prev: {total_expected:.1f}h", "#ccc"),
-            (f"Extras: +{emp.total_overtime_hours:.1f}h", "#2a9d8f"),
-            (f"Déficit: -{emp.total_deficit_hours:.1f}h", "#e63946"),
-            (f"Faltas: {emp.total_absent_days}", "#f4a261"),
+            (f"Extras: +{totals.overtime_hours:.1f}h", "#2a9d8f"),
+            (f"Déficit: -{totals.deficit_hours:.1f}h", "#e63946"),
+            (f"Faltas: {totals.absent_days}", "#f4a261"),
             (f"Banco: {bank_sign}{bank:.1f}h", bank_color),
         ]
         for txt, color in info_items:
@@ -698,11 +1003,9 @@ class MainWindow(ctk.CTk):
                 font=("Segoe UI", 8, "bold"), text_color="white"
             ).pack(side='left', padx=0)
         
-        DIAS = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
-        
         for idx, wd in enumerate(emp.workdays):
             weekday = wd.date.weekday()
-            day_str = f"{wd.date.strftime('%d/%m')} {DIAS[weekday]}"
+            day_str = f"{wd.date.strftime('%d/%m')} {_DAY_NAMES[weekday]}"
             
             # Cor de fundo alternada + estados
             if wd.is_absent and wd.is_workday and not wd.punches:
@@ -856,7 +1159,13 @@ class MainWindow(ctk.CTk):
                         wd.deficit_hours = max(0, -diff)
             except Exception as ex:
                 print(f"[Recalc] Erro: {ex}")
-        
+
+        # Os agregados de Employee.totals são memoizados pela contagem de
+        # dias; a edição acima é in-place e não muda o tamanho da lista,
+        # então invalida explicitamente para o preview e o PDF relerem
+        if changes > 0 and hasattr(self, '_preview_emp'):
+            self._preview_emp._totals_cache = None
+
         self.status_label.configure(
             text=f"✅ {changes} alteração(ões) salva(s)! Serão refletidas no PDF."
         )
@@ -887,10 +1196,8 @@ class MainWindow(ctk.CTk):
         self.update()
         
         try:
-            from app.pdf_export import PDFExporter
             import os
-            exporter = PDFExporter()
-            exporter.export_employee(
+            self._get_exporter().export_employee(
                 self.report, self._preview_emp, filepath
             )
             self.status_label.configure(
@@ -907,65 +1214,101 @@ class MainWindow(ctk.CTk):
         self._build_right_panel()
         self._update_employee_list()
     
+    def _get_exporter(self):
+        """Retorna o PDFExporter compartilhado, criando-o no primeiro uso.
+
+        O __init__ do exportador resolve fontes/assets; fazer isso uma
+        vez por sessão em vez de uma vez por export.
+        """
+        if self._exporter is None:
+            from app.pdf_export import PDFExporter
+            self._exporter = PDFExporter()
+        return self._exporter
+
     def _export_individual(self):
         """Exporta PDFs individuais."""
-        if not self.report:
+        with self._report_lock:
+            report = self.report
+        if not report:
             return
-        
+
         output_dir = filedialog.askdirectory(title="Selecione a pasta de destino")
         if not output_dir:
             return
-        
+
         self.status_label.configure(text="⏳ Gerando PDFs individuais...")
-        self.update()
-        
-        try:
-            exporter = PDFExporter()
-            files = exporter.export_individual(self.report, output_dir)
-            
-            self.status_label.configure(
-                text=f"✅ {len(files)} PDFs gerados em {output_dir}"
-            )
-            
-            # Abre a pasta
-            os.startfile(output_dir)
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao gerar PDFs:\n{str(e)}")
-            self.status_label.configure(text=f"❌ Erro na exportação: {str(e)}")
-    
+        self._set_export_buttons('disabled')
+        self.update_idletasks()
+
+        def _job():
+            try:
+                files = self._get_exporter().export_individual(report, output_dir)
+            except Exception as e:
+                self.after(0, self._export_failed, str(e))
+                return
+            self.after(0, self._finish_export_individual, files, output_dir)
+
+        threading.Thread(target=_job, daemon=True).start()
+
+    def _finish_export_individual(self, files: list, output_dir: str):
+        """Conclui a exportação individual (thread principal)."""
+        self._set_export_buttons('normal')
+        self.status_label.configure(
+            text=f"✅ {len(files)} PDFs gerados em {output_dir}"
+        )
+        # Abre a pasta
+        os.startfile(output_dir)
+
     def _export_consolidated(self):
         """Exporta PDF consolidado."""
-        if not self.report:
+        with self._report_lock:
+            report = self.report
+        if not report:
             return
-        
+
         import re
-        safe_period = re.sub(r'[^\w]', '_', self.report.period_label)
+        safe_period = re.sub(r'[^\w]', '_', report.period_label)
         filepath = filedialog.asksaveasfilename(
             title="Salvar PDF Consolidado",
             defaultextension=".pdf",
             filetypes=[("PDF", "*.pdf")],
             initialfile=f"Ponto_Consolidado_{safe_period}.pdf"
         )
-        
+
         if not filepath:
             return
-        
+
         self.status_label.configure(text="⏳ Gerando PDF consolidado...")
-        self.update()
-        
-        try:
-            exporter = PDFExporter()
-            exporter.export_consolidated(self.report, filepath)
-            
-            self.status_label.configure(text=f"✅ PDF consolidado salvo: {filepath}")
-            
-            # Abre o PDF
-            os.startfile(filepath)
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao gerar PDF:\n{str(e)}")
-            self.status_label.configure(text=f"❌ Erro na exportação: {str(e)}")
+        self._set_export_buttons('disabled')
+        self.update_idletasks()
+
+        def _job():
+            try:
+                self._get_exporter().export_consolidated(report, filepath)
+            except Exception as e:
+                self.after(0, self._export_failed, str(e))
+                return
+            self.after(0, self._finish_export_consolidated, filepath)
+
+        threading.Thread(target=_job, daemon=True).start()
+
+    def _finish_export_consolidated(self, filepath: str):
+        """Conclui a exportação consolidada (thread principal)."""
+        self._set_export_buttons('normal')
+        self.status_label.configure(text=f"✅ PDF consolidado salvo: {filepath}")
+        # Abre o PDF
+        os.startfile(filepath)
+
+    def _export_failed(self, error: str):
+        """Mostra falha da exportação (thread principal)."""
+        self._set_export_buttons('normal')
+        messagebox.showerror("Erro", f"Erro ao gerar PDF:\n{error}")
+        self.status_label.configure(text=f"❌ Erro na exportação: {error}")
+
+    def _set_export_buttons(self, state: str):
+        """Habilita/desabilita os botões de exportação em bloco."""
+        self.btn_export_individual.configure(state=state)
+        self.btn_export_consolidated.configure(state=state)
     
     def _open_clock_dialog(self):
         """Abre diálogo para puxar AFD do relógio ControlID."""
@@ -974,50 +1317,11 @@ class MainWindow(ctk.CTk):
         self.wait_window(dialog)
         
         # Se o diálogo retornou um arquivo AFD, importa automaticamente
+        # (mesmo fluxo do _import_file: parse em thread + _apply_parse_result)
         if hasattr(dialog, 'afd_filepath') and dialog.afd_filepath:
             self.afd_filepath = dialog.afd_filepath
             self.lbl_filename.configure(text=f"(Relogio) {os.path.basename(dialog.afd_filepath)}")
-            self.status_label.configure(text="AFD recebido do relogio! Processando...")
-            self.update()
-            
-            # Parse o arquivo
-            self.parser = AFDParser()
-            employees, company = self.parser.parse_file(dialog.afd_filepath)
-            
-            if company.name and not self.company.name:
-                self.company.name = company.name
-            if company.cnpj and not self.company.cnpj:
-                self.company.cnpj = company.cnpj
-            
-            summary = self.parser.get_summary()
-            self.lbl_company.configure(
-                text=f"{summary['company_name'] or 'Empresa nao identificada'}\n"
-                     f"CNPJ: {summary['company_cnpj'] or 'N/A'}"
-            )
-            self.lbl_stats.configure(
-                text=f"{summary['total_punches']} marcacoes | "
-                     f"{summary['total_employees']} colaboradores | "
-                     f"Formato: {summary['format'].upper()}"
-            )
-            
-            months = summary['months_available']
-            month_names = [
-                '', 'Janeiro', 'Fevereiro', 'Marco', 'Abril', 'Maio', 'Junho',
-                'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-            ]
-            month_labels = [f"{month_names[m]} / {y}" for m, y in months]
-            
-            if month_labels:
-                self.month_dropdown.configure(values=month_labels)
-                self.month_var.set(month_labels[-1])
-                last_month, last_year = months[-1]
-                self.selected_month = last_month
-                self.selected_year = last_year
-                self.btn_process.configure(state='normal')
-            
-            # Auto-processa
-            if self.selected_month and self.parser:
-                self._process()
+            self._start_parse(dialog.afd_filepath)
     
     def _open_settings(self):
         """Abre a janela de configurações."""
@@ -1062,13 +1366,28 @@ class MainWindow(ctk.CTk):
                     'daily_hours': self.schedule.daily_hours,
                     'saturday_hours': self.schedule.saturday_hours,
                     'workdays': self.schedule.workdays,
-                }
+                },
+                'last_update_check': self._last_update_check,
             }
             
+            # Serializa compacto (sem indent) e só toca o disco se o
+            # conteúdo realmente mudou desde o último save
+            payload = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+            if payload == self._last_config_payload:
+                return
+
+            # CONFIG_FILE já é absoluto e o diretório foi criado no
+            # import (_get_config_path) — nada a resolver por save.
+            # Escrita atômica: temp + fsync + rename — um crash no meio
+            # do save nunca deixa um config.json truncado para trás
             config_path = CONFIG_FILE
-            os.makedirs(os.path.dirname(config_path), exist_ok=True)
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            tmp_path = config_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, config_path)
+            self._last_config_payload = payload
             print(f"[Config] Salvo em: {config_path}")
         except Exception as e:
             print(f"[Config] Erro ao salvar: {e}")
@@ -1124,7 +1443,9 @@ class MainWindow(ctk.CTk):
             self.schedule.weekly_hours = s.get('weekly_hours', 44.0)
             self.schedule.saturday_hours = s.get('saturday_hours', 4.0)
             self.schedule.workdays = s.get('workdays', [0, 1, 2, 3, 4, 5])
-            
+
+            self._last_update_check = config.get('last_update_check', 0.0)
+
             print(f"[Config] Carregado: empresa='{self.company.name}', escala={self.schedule.schedule_type.value}")
             
         except Exception as e:
@@ -1160,18 +1481,41 @@ class SettingsWindow(ctk.CTkToplevel):
             default_schedule=company.default_schedule
         )
         self.schedule = schedule
-        
+        # Id do after() pendente do debounce do dropdown de escala
+        self._sched_after_id: Optional[str] = None
+        # Basename da logo, computado uma vez por janela
+        self._logo_basename = (
+            os.path.basename(self.company.logo_path)
+            if self.company.logo_path else "Nenhuma"
+        )
+        # Campos numéricos pré-validados a cada edição (None = inválido);
+        # o _save só lê o valor pronto, sem try/except no caminho quente
+        self._cached_daily_hours: Optional[float] = schedule.daily_hours
+        self._cached_tolerance: Optional[int] = schedule.tolerance_minutes
+
         self._build_ui()
     
     def _build_ui(self):
         """Constrói a interface de configurações."""
         scroll = ctk.CTkScrollableFrame(self)
         scroll.pack(fill='both', expand=True, padx=10, pady=10)
-        
+
+        # Suprime a propagação de geometria enquanto os ~20 widgets são
+        # criados — cada pack dispararia um recálculo de layout; com ela
+        # desligada o Tk faz um único passe quando ela volta no finally
+        scroll.pack_propagate(False)
+        try:
+            self._build_form(scroll)
+        finally:
+            scroll.pack_propagate(True)
+            scroll.update_idletasks()
+
+    def _build_form(self, scroll):
+        """Preenche o formulário de configurações dentro do scroll."""
         # === Dados da Empresa ===
         ctk.CTkLabel(
             scroll, text="DADOS DA EMPRESA",
-            font=("Segoe UI", 14, "bold")
+            font=_FONT_SECTION
         ).pack(fill='x', pady=(0, 10))
         
         self.entry_name = self._add_field(scroll, "Nome / Razão Social", self.company.name)
@@ -1184,11 +1528,11 @@ class SettingsWindow(ctk.CTkToplevel):
         # Logo
         logo_frame = ctk.CTkFrame(scroll, fg_color="transparent")
         logo_frame.pack(fill='x', pady=5)
-        ctk.CTkLabel(logo_frame, text="Logo:", font=("Segoe UI", 11)).pack(side='left')
+        ctk.CTkLabel(logo_frame, text="Logo:", font=_FONT_LABEL).pack(side='left')
         self.lbl_logo = ctk.CTkLabel(
-            logo_frame, 
-            text=os.path.basename(self.company.logo_path) if self.company.logo_path else "Nenhuma",
-            font=("Segoe UI", 10), text_color="#aaa"
+            logo_frame,
+            text=self._logo_basename,
+            font=_FONT_SMALL, text_color="#aaa"
         )
         self.lbl_logo.pack(side='left', padx=10)
         ctk.CTkButton(
@@ -1202,14 +1546,14 @@ class SettingsWindow(ctk.CTkToplevel):
         # === Escala de Trabalho ===
         ctk.CTkLabel(
             scroll, text="ESCALA DE TRABALHO",
-            font=("Segoe UI", 14, "bold")
+            font=_FONT_SECTION
         ).pack(fill='x', pady=(0, 5))
         
         # Nota explicativa
         ctk.CTkLabel(
             scroll,
             text="A escala define quantas horas/dia são esperadas.\nOs horários reais vêm do relógio de ponto (arquivo AFD).",
-            font=("Segoe UI", 10), text_color="#888",
+            font=_FONT_SMALL, text_color="#888",
             justify='left'
         ).pack(fill='x', pady=(0, 10))
         
@@ -1217,7 +1561,7 @@ class SettingsWindow(ctk.CTkToplevel):
         self.settings_schedule_var = ctk.StringVar(
             value=SCHEDULE_LABELS.get(self.schedule.schedule_type, "5x2")
         )
-        ctk.CTkLabel(scroll, text="Tipo de Escala", font=("Segoe UI", 11)).pack(anchor='w')
+        ctk.CTkLabel(scroll, text="Tipo de Escala", font=_FONT_LABEL).pack(anchor='w')
         self.settings_schedule_dropdown = ctk.CTkOptionMenu(
             scroll, variable=self.settings_schedule_var,
             values=list(SCHEDULE_LABELS.values()),
@@ -1230,17 +1574,21 @@ class SettingsWindow(ctk.CTkToplevel):
             scroll, "Horas esperadas por dia",
             str(self.schedule.daily_hours)
         )
-        
+        self.entry_daily_hours.bind('<KeyRelease>', self._validate_daily_hours)
+        self.entry_daily_hours.bind('<FocusOut>', self._validate_daily_hours)
+
         # Tolerância
         self.entry_tolerance = self._add_field(
-            scroll, "Tolerância para atraso (minutos — CLT art. 58)", 
+            scroll, "Tolerância para atraso (minutos — CLT art. 58)",
             str(self.schedule.tolerance_minutes)
         )
+        self.entry_tolerance.bind('<KeyRelease>', self._validate_tolerance)
+        self.entry_tolerance.bind('<FocusOut>', self._validate_tolerance)
         
         # Info da escala selecionada
         self.lbl_schedule_info = ctk.CTkLabel(
             scroll, text="",
-            font=("Segoe UI", 10), text_color="#2a9d8f",
+            font=_FONT_SMALL, text_color="#2a9d8f",
             justify='left'
         )
         self.lbl_schedule_info.pack(fill='x', pady=5)
@@ -1252,7 +1600,7 @@ class SettingsWindow(ctk.CTkToplevel):
         # === Sobre / Atualização ===
         ctk.CTkLabel(
             scroll, text="SOBRE / ATUALIZAÇÃO",
-            font=("Segoe UI", 14, "bold")
+            font=_FONT_SECTION
         ).pack(fill='x', pady=(0, 5))
         
         # Versão atual
@@ -1272,7 +1620,7 @@ class SettingsWindow(ctk.CTkToplevel):
         # Status da atualização
         self.lbl_update_status = ctk.CTkLabel(
             scroll, text="",
-            font=("Segoe UI", 10), text_color="#888"
+            font=_FONT_SMALL, text_color="#888"
         )
         self.lbl_update_status.pack(fill='x', pady=(5, 0))
         
@@ -1297,26 +1645,55 @@ class SettingsWindow(ctk.CTkToplevel):
         ).pack(fill='x', pady=15)
     
     def _on_schedule_type_changed(self, value: str):
+        """Debounce: só a última troca de escala da rajada é aplicada.
+
+        Navegar no dropdown com as setas dispara o callback várias vezes
+        em <50 ms; cada aplicação reescreve o campo e reconfigura o
+        label de info, com recálculo de geometria em cada uma.
+        """
+        if self._sched_after_id is not None:
+            self.after_cancel(self._sched_after_id)
+        self._sched_after_id = self.after(80, self._apply_schedule_change, value)
+
+    def _apply_schedule_change(self, value: str):
         """Atualiza horas/dia quando muda a escala."""
+        self._sched_after_id = None
         stype = SCHEDULE_FROM_LABEL.get(value, ScheduleType.SCALE_5X2)
-        defaults = self.SCHEDULE_DEFAULTS.get(stype, {})
-        daily = defaults.get("daily", 8.0)
-        
-        # Atualiza campo de horas
-        self.entry_daily_hours.delete(0, 'end')
-        self.entry_daily_hours.insert(0, str(daily))
-        
+        daily = _resolve_schedule(stype)[0]
+
+        # Atualiza campo de horas — só reescreve se o valor mudou, cada
+        # delete/insert dispara o trace da StringVar interna e um redraw
+        new_daily = str(daily)
+        if self.entry_daily_hours.get() != new_daily:
+            self.entry_daily_hours.delete(0, 'end')
+            self.entry_daily_hours.insert(0, new_daily)
+        # delete/insert programático não dispara <KeyRelease>
+        self._cached_daily_hours = daily
+
         self._update_schedule_info()
-    
+
+    def _validate_daily_hours(self, event=None):
+        """Valida o campo de horas/dia no momento da edição."""
+        text = self.entry_daily_hours.get().strip()
+        try:
+            self._cached_daily_hours = float(text)
+        except ValueError:
+            self._cached_daily_hours = None
+
+    def _validate_tolerance(self, event=None):
+        """Valida o campo de tolerância no momento da edição."""
+        text = self.entry_tolerance.get().strip()
+        try:
+            self._cached_tolerance = int(text)
+        except ValueError:
+            self._cached_tolerance = None
+
     def _update_schedule_info(self):
         """Mostra info resumida da escala."""
         value = self.settings_schedule_var.get()
         stype = SCHEDULE_FROM_LABEL.get(value, ScheduleType.SCALE_5X2)
-        defaults = self.SCHEDULE_DEFAULTS.get(stype, {})
-        label = defaults.get("label", "")
-        days = defaults.get("days", [])
-        day_names = ["Seg","Ter","Qua","Qui","Sex","Sáb","Dom"]
-        day_str = ", ".join(day_names[d] for d in days if d < 7)
+        _, _, days, label = _resolve_schedule(stype)
+        day_str = _format_days(days)
         self.lbl_schedule_info.configure(
             text=f"Jornada: {label}\nDias de trabalho: {day_str}"
         )
@@ -1326,7 +1703,7 @@ class SettingsWindow(ctk.CTkToplevel):
         frame = ctk.CTkFrame(parent, fg_color="transparent")
         frame.pack(fill='x', pady=3)
         
-        ctk.CTkLabel(frame, text=label, font=("Segoe UI", 11)).pack(anchor='w')
+        ctk.CTkLabel(frame, text=label, font=_FONT_LABEL).pack(anchor='w')
         entry = ctk.CTkEntry(frame, height=32)
         entry.pack(fill='x')
         if value:
@@ -1342,7 +1719,8 @@ class SettingsWindow(ctk.CTkToplevel):
         )
         if filepath:
             self.company.logo_path = filepath
-            self.lbl_logo.configure(text=os.path.basename(filepath))
+            self._logo_basename = os.path.basename(filepath)
+            self.lbl_logo.configure(text=self._logo_basename)
     
     def _save(self):
         """Salva as configurações e fecha."""
@@ -1358,20 +1736,18 @@ class SettingsWindow(ctk.CTkToplevel):
             self.settings_schedule_var.get(), ScheduleType.SCALE_6X1
         )
         self.schedule.schedule_type = stype
-        defaults = self.SCHEDULE_DEFAULTS.get(stype, {})
-        self.schedule.workdays = defaults.get("days", [0,1,2,3,4,5])
-        self.schedule.saturday_hours = defaults.get("sat", 0)
-        
-        try:
-            self.schedule.daily_hours = float(self.entry_daily_hours.get().strip())
-        except ValueError:
-            pass
-        
-        try:
-            self.schedule.tolerance_minutes = int(self.entry_tolerance.get().strip())
-        except ValueError:
-            pass
-        
+        _, sat, days, _ = _resolve_schedule(stype)
+        # list(): workdays não pode aliasear a tupla memoizada
+        self.schedule.workdays = list(days)
+        self.schedule.saturday_hours = sat
+        
+        # Valores já validados durante a edição — campo inválido (None)
+        # mantém o valor anterior, como antes
+        if self._cached_daily_hours is not None:
+            self.schedule.daily_hours = self._cached_daily_hours
+        if self._cached_tolerance is not None:
+            self.schedule.tolerance_minutes = self._cached_tolerance
+
         self.destroy()
     
     def _check_update_manual(self):
@@ -1439,6 +1815,9 @@ class ClockDialog(ctk.CTkToplevel):
         
         self.afd_filepath = ""  # Resultado: caminho do AFD baixado
         self._parent = parent
+        # Cliente ControlID reutilizado entre "Testar" e "Baixar"
+        self._client = None
+        self._client_key: Optional[tuple] = None
         
         # Carrega configurações salvas do relógio
         self._saved_ip = ""
@@ -1521,26 +1900,40 @@ class ClockDialog(ctk.CTkToplevel):
         )
         self.btn_download.pack(fill='x')
     
+    def _get_client(self):
+        """Retorna o ControlIDClient compartilhado do diálogo.
+
+        A sessão autenticada (e o cache de protocolo do client) sobrevive
+        entre "Testar Conexao" e "Baixar AFD"; uma mudança de IP, usuário
+        ou senha descarta o client e cria outro.
+        """
+        from app.controlid_api import ControlIDClient, ControlIDDevice
+
+        key = (
+            self.entry_ip.get().strip(),
+            self.entry_login.get().strip(),
+            self.entry_password.get().strip(),
+        )
+        if self._client is None or key != self._client_key:
+            device = ControlIDDevice(ip=key[0], login=key[1], password=key[2])
+            self._client = ControlIDClient(device)
+            self._client_key = key
+        return self._client
+
     def _test_connection(self):
         """Testa a conexão com o relógio."""
         ip = self.entry_ip.get().strip()
         if not ip:
             self.lbl_status.configure(text="Informe o IP do relogio.", text_color="#e63946")
             return
-        
+
         self.lbl_status.configure(text="Conectando...", text_color="#f4a261")
-        self.update()
-        
+        # update_idletasks escopado no label: repinta só ele, sem reentrar
+        # na fila de eventos inteira como self.update() fazia
+        self.lbl_status.update_idletasks()
+
         try:
-            from app.controlid_api import ControlIDClient, ControlIDDevice
-            
-            device = ControlIDDevice(
-                ip=ip,
-                login=self.entry_login.get().strip(),
-                password=self.entry_password.get().strip()
-            )
-            client = ControlIDClient(device)
-            success, msg = client.test_connection()
+            success, msg = self._get_client().test_connection()
             
             if success:
                 self.lbl_status.configure(text=f"Conectado! {msg}", text_color="#2a9d8f")
@@ -1560,19 +1953,12 @@ class ClockDialog(ctk.CTkToplevel):
         
         self.lbl_status.configure(text="Conectando e baixando AFD...", text_color="#f4a261")
         self.btn_download.configure(state='disabled')
-        self.update()
+        self.lbl_status.update_idletasks()
         
         try:
-            from app.controlid_api import ControlIDClient, ControlIDDevice
-            
-            device = ControlIDDevice(
-                ip=ip,
-                login=self.entry_login.get().strip(),
-                password=self.entry_password.get().strip()
-            )
-            client = ControlIDClient(device)
+            client = self._get_client()
             client.connect()
-            
+
             # Baixa o AFD
             filepath = client.download_afd()
             
@@ -1592,34 +1978,20 @@ class ClockDialog(ctk.CTkToplevel):
             self.btn_download.configure(state='normal')
     
     def _save_clock_config(self):
-        """Salva configurações do relógio."""
+        """Salva configurações do relógio (via cache, flush em background)."""
         try:
-            config_path = os.path.abspath(CONFIG_FILE)
-            config = {}
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-            
-            config['clock'] = {
+            _CONFIG_CACHE.update('clock', {
                 'ip': self.entry_ip.get().strip(),
                 'login': self.entry_login.get().strip(),
                 'password': self.entry_password.get().strip(),
-            }
-            
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            })
         except Exception:
             pass
-    
+
     def _load_clock_config(self):
         """Carrega configurações salvas do relógio."""
         try:
-            config_path = os.path.abspath(CONFIG_FILE)
-            if not os.path.exists(config_path):
-                return
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            clock = config.get('clock', {})
+            clock = _CONFIG_CACHE.get().get('clock', {})
             self._saved_ip = clock.get('ip', '')
             self._saved_login = clock.get('login', 'admin')
             self._saved_password = clock.get('password', 'admin')
@@ -1765,10 +2137,20 @@ class HelpDialog(ctk.CTkToplevel):
             )
         },
     ]
-    
+
+    # Títulos numerados pré-formatados e fontes compartilhadas — o
+    # trabalho por card roda uma vez no load da classe, não a cada
+    # abertura do diálogo
+    FAQ_PRECOMPUTED = [
+        (f"{i + 1}. {item['titulo']}", item['resposta'])
+        for i, item in enumerate(FAQ_ITEMS)
+    ]
+    _FONT_FAQ_TITLE = ("Segoe UI", 12, "bold")
+    _FONT_FAQ_BODY = ("Segoe UI", 11)
+
     def __init__(self, parent):
         super().__init__(parent)
-        
+
         self.title("Ajuda - Bit-Converter")
         self.geometry("600x550")
         self.minsize(500, 450)
@@ -1791,8 +2173,8 @@ class HelpDialog(ctk.CTkToplevel):
         scroll = ctk.CTkScrollableFrame(self, fg_color="transparent")
         scroll.pack(fill='both', expand=True, padx=10, pady=10)
         
-        for i, item in enumerate(self.FAQ_ITEMS):
-            self._add_faq_item(scroll, i + 1, item["titulo"], item["resposta"])
+        for titulo, resposta in self.FAQ_PRECOMPUTED:
+            self._add_faq_item(scroll, titulo, resposta)
         
         # Footer
         footer = ctk.CTkFrame(self, height=35, fg_color=("#1a1a2e", "#1a1a2e"))
@@ -1804,22 +2186,22 @@ class HelpDialog(ctk.CTkToplevel):
             font=("Segoe UI", 9), text_color="#888"
         ).pack(pady=8)
     
-    def _add_faq_item(self, parent, num: int, titulo: str, resposta: str):
-        """Adiciona um item de FAQ."""
+    def _add_faq_item(self, parent, titulo: str, resposta: str):
+        """Adiciona um item de FAQ (título já vem numerado)."""
         card = ctk.CTkFrame(parent, fg_color=("#2a2a3e", "#2a2a3e"), corner_radius=8)
         card.pack(fill='x', pady=4)
-        
+
         # Titulo
         ctk.CTkLabel(
-            card, text=f"{num}. {titulo}",
-            font=("Segoe UI", 12, "bold"), anchor='w',
+            card, text=titulo,
+            font=self._FONT_FAQ_TITLE, anchor='w',
             text_color="#e0e0ff"
         ).pack(fill='x', padx=12, pady=(10, 4))
-        
+
         # Resposta
         ctk.CTkLabel(
             card, text=resposta,
-            font=("Segoe UI", 11), anchor='w', justify='left',
+            font=self._FONT_FAQ_BODY, anchor='w', justify='left',
             text_color="#bbb", wraplength=530
         ).pack(fill='x', padx=12, pady=(0, 10))
     
@@ -1885,11 +2267,12 @@ class UpdateDialog(ctk.CTkToplevel):
         self.geometry("500x400")
         self.resizable(False, False)
         
-        # Centraliza na tela
-        self.update_idletasks()
-        x = (self.winfo_screenwidth() - 500) // 2
-        y = (self.winfo_screenheight() - 400) // 2
-        self.geometry(f"500x400+{x}+{y}")
+        # Centraliza sobre a janela pai — winfo_rootx/width do pai já
+        # estão disponíveis sem o update_idletasks() que forçava um passe
+        # completo de geometria no diálogo ainda vazio
+        x = parent.winfo_rootx() + (parent.winfo_width() - 500) // 2
+        y = parent.winfo_rooty() + (parent.winfo_height() - 400) // 2
+        self.geometry(f"500x400+{max(x, 0)}+{max(y, 0)}")
         
         self._build_ui()
     
@@ -2012,7 +2395,10 @@ class UpdateDialog(ctk.CTkToplevel):
         self.progress_bar.set(1.0)
         self.lbl_progress.configure(text="Download concluído! Aplicando...")
         
-        # Aplica a atualização (substitui o .exe)
+        # Aplica a atualização (substitui o .exe). Resultados aparecem
+        # inline no próprio diálogo — messagebox abriria um mainloop
+        # aninhado sobre o principal, segurando os callbacks after()
+        # pendentes da thread de download até o clique do usuário.
         if getattr(sys, 'frozen', False):
             # Modo empacotado — aplica de verdade
             success = apply_update(new_exe_path)
@@ -2020,20 +2406,32 @@ class UpdateDialog(ctk.CTkToplevel):
                 self.lbl_progress.configure(text="Reiniciando...")
                 self.after(1000, lambda: sys.exit(0))
             else:
-                messagebox.showerror(
+                self.lbl_progress.configure(
+                    text=(
+                        "Não foi possível aplicar a atualização.\n"
+                        f"O arquivo foi salvo em: {new_exe_path}"
+                    ),
+                    text_color="#e63946"
+                )
+                self.btn_cancel.configure(state='normal')
+                self._downloading = False
+                # Último recurso: o aviso de substituição manual ainda
+                # merece um modal, mas só depois da fila de idle drenar
+                self.after_idle(
+                    messagebox.showerror,
                     "Erro",
                     "Não foi possível aplicar a atualização.\n"
                     f"O arquivo foi salvo em:\n{new_exe_path}\n\n"
                     "Substitua manualmente o Bit-Converter.exe."
                 )
-                self.btn_cancel.configure(state='normal')
-                self._downloading = False
         else:
             # Modo desenvolvimento — só avisa
-            messagebox.showinfo(
-                "Atualização (Dev Mode)",
-                f"Em modo desenvolvimento, a atualização não é aplicada automaticamente.\n"
-                f"Novo .exe salvo em:\n{new_exe_path}"
+            self.lbl_progress.configure(
+                text=(
+                    "Modo dev: atualização não é aplicada automaticamente.\n"
+                    f"Novo .exe salvo em: {new_exe_path}"
+                ),
+                text_color="#f4a261"
             )
             self.btn_cancel.configure(state='normal')
             self._downloading = False